@@ -1,113 +1,293 @@
-from collections import UserDict
-from datetime import date, timedelta
+from collections import UserDict, defaultdict
+from itertools import islice
+from datetime import date
+from pathlib import Path
+import copy
 import pickle
 
 try:
+   from classes.columns import ContactColumns
+   from classes.indexes import BirthdayIndex, EmailIndex, FuzzyIndex, KeyIndex, NameIndex, PhoneIndex
+   from classes.journal import Journal
+   from classes.query import Query
    from classes.record import Record
-   from settings.settings import addressbook_filename, PAG
+   from classes.writer import atomic_dump, background_writer
+   from settings.settings import addressbook_filename, PAG, ADDRESSBOOK_STORAGE, JOURNAL_COMPACT_SIZE, NORMALIZED_NAMES
 except ModuleNotFoundError:
+   from personal_assistant_bot.classes.columns import ContactColumns
+   from personal_assistant_bot.classes.indexes import BirthdayIndex, EmailIndex, FuzzyIndex, KeyIndex, NameIndex, PhoneIndex
+   from personal_assistant_bot.classes.journal import Journal
+   from personal_assistant_bot.classes.query import Query
    from personal_assistant_bot.classes.record import Record
-   from personal_assistant_bot.settings.settings import addressbook_filename, PAG
+   from personal_assistant_bot.classes.writer import atomic_dump, background_writer
+   from personal_assistant_bot.settings.settings import addressbook_filename, PAG, ADDRESSBOOK_STORAGE, JOURNAL_COMPACT_SIZE, NORMALIZED_NAMES
 
 from colorama import init, Fore
 init(autoreset=True)
 
 
 class AddressBook(UserDict):
+    INDEXES = {"birthdays": BirthdayIndex, "emails": EmailIndex, "fuzzy": FuzzyIndex, "keys": KeyIndex, "names": NameIndex, "phones": PhoneIndex}
+
+    def __init__(self, *args, **kwargs):
+        # generation - номер знімка, росте з кожним compact; записи журналу позначаються ним
+        self.generation = 0
+        self._pending = set()
+        self._saves = []
+        self._save_errors = []
+        self._journal_entries = 0
+        self._indexes = {}
+        self.version = 0
+        super().__init__(*args, **kwargs)
+
+    def __getstate__(self):
+        return {"data": self.data, "generation": self.generation}
+
+    def __setstate__(self, state):
+        self.generation = state.get("generation", 0)
+        self._pending = set()
+        self._saves = []
+        self._save_errors = []
+        self._journal_entries = 0
+        self._indexes = {}
+        self.version = 0
+        self.data = state["data"]
+        for record in self.data.values():
+            self._attach(record)
+
+    def __setitem__(self, name, record):
+        self._put(name, record)
+        self._mark(name)
+
+    def __delitem__(self, name):
+        self._drop(name)
+        self._mark(name)
+
+    def _mark(self, name):
+        # Змінені з останнього збереження імена; version росте з кожною зміною
+        self._pending.add(name)
+        self.version += 1
+
+    @property
+    def unsaved_changes(self):
+        self._check_saves()
+        return len(self._pending)
+
+    def _track(self, future, names):
+        # Фонове збереження імен names; результат перевіряє _check_saves
+        self._saves.append((future, names))
+
+    def _check_saves(self):
+        # Імена з фонових збережень, що не вдалися, знову стають незбереженими
+        running = []
+        for future, names in self._saves:
+            if not future.done():
+                running.append((future, names))
+            elif future.exception() is not None:
+                self._pending |= names
+                self._save_errors.append(future.exception())
+        self._saves = running
+
+    def report_save_errors(self):
+        # Помилки фонових збережень друкуються тут, у потоці меню (при наступному показі меню);
+        # True - помилок не було
+        self._check_saves()
+        errors, self._save_errors = self._save_errors, []
+        for error in errors:
+            print(Fore.RED + f"\nError saving AddressBook: {error}")
+        return not errors
+
+    def _put(self, name, record):
+        if name in self.data:
+            self._drop(name)
+        self._attach(record)
+        self.data[name] = record
+        for index in self._indexes.values():
+            index.add(name, record)
+
+    def _drop(self, name):
+        record = self.data.pop(name)
+        self._detach(record)
+        for index in self._indexes.values():
+            index.remove(name)
+        return record
+
+    def _index(self, index_name):
+        # Індекси будуються при першому запиті і далі оновлюються інкрементально
+        index = self._indexes.get(index_name)
+        if index is None:
+            index = self.INDEXES[index_name]()
+            for name, record in self.data.items():
+                index.add(name, record)
+            self._indexes[index_name] = index
+        return index
+
+    def _attach(self, record):
+        record._on_change = self._record_changed
+
+    def _detach(self, record):
+        record._on_change = None
+
+    def _record_changed(self, record, field, old, new):
+        if field == "name":
+            if self.data.get(old) is record:
+                del self[old]
+            self[new] = record
+        else:
+            name = record.name.value
+            for index in self._indexes.values():
+                index.changed(name, record, field, old, new)
+            self._mark(name)
+
+    @staticmethod
+    def _subset(records):
+        # Результати пошуку не підписуються на зміни записів
+        book = AddressBook()
+        for record in records:
+            book.data[record.name.value] = record
+        return book
+
     def add_record(self, record):
-        self.data[record.name.value] = record
+        self[record.name.value] = record
+
+    def _resolve(self, name):
+        # "john  black" знайде "John Black", якщо точного ключа немає
+        if name in self.data:
+            return name
+        if NORMALIZED_NAMES:
+            names = self._index("keys").get(name)
+            if names:
+                return min(names)
+        return None
 
     def find(self, name):
-        if name in self:
-            for i in self:
-                if i == name:
-                    return self.data[i]
-        else:
-            return None
+        key = self._resolve(name)
+        return None if key is None else self.data[key]
 
     def delete(self, name):
-        if name in self:
-            for i in self:
-                if i == name:
-                    self.data.pop(name)
-                    self.write_contacts_to_file(addressbook_filename)
-                    print(Fore.GREEN + f"Record '{name}' deleted successful!")
-                    return True
+        key = self._resolve(name)
+        if key is not None:
+            name = key
+            del self[name]
+            print(Fore.GREEN + f"Record '{name}' deleted successful!")
+            return True
         else:
             print(Fore.RED + f"Record '{name}' not found!")
             return None
 
+    def dedup_phones(self):
+        return sum(record.dedup_phones() for record in list(self.data.values()))
+
+    def find_duplicates(self):
+        # Записи з спільним телефоном або email об'єднуються в групи (union-find)
+        parent, owners = {}, {}
+
+        def root(name):
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        for name, record in self.data.items():
+            parent.setdefault(name, name)
+            _, phones, _, email, _ = record.as_row()
+            keys = [("phone", number) for number in phones]
+            if email:
+                keys.append(("email", email.casefold()))
+            for key in keys:
+                owner = owners.setdefault(key, name)
+                if owner != name:
+                    parent[root(name)] = root(owner)
+
+        groups = defaultdict(list)
+        for name in parent:
+            groups[root(name)].append(name)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
+
+    def columns(self):
+        return ContactColumns.from_records(self.data.values())
+
+    def _records_from(self, offset):
+        return islice(self.data.values(), offset, None)
+
+    def pages(self, page_size=PAG, offset=0):
+        # Сторінки записів без рядків і без input/print, будуються по мірі читання
+        records = self._records_from(offset)
+        while True:
+            page = list(islice(records, page_size))
+            if not page:
+                break
+            yield page
+
     def iterator_simple(self):
-        st_list, obj_len = [], len(self.data)
-
-        for i, (name, record) in enumerate(self.data.items(), 1):
-            st_list.append(str(record))
-            if i % PAG == 0:
-                print('\n'.join(st_list))
-                st_list.clear()
-                if i != obj_len and input(f"-->You can ^^see^^ {i} records from {obj_len}\n-->press any key to continue or 'q' to exit --> ").lower() == "q":
-                    break
-        if st_list:
-            print('\n'.join(st_list))
+        obj_len, i = len(self.data), 0
+
+        for page in self.pages():
+            i += len(page)
+            print('\n'.join(str(record) for record in page))
+            if i != obj_len and input(f"-->You can ^^see^^ {i} records from {obj_len}\n-->press any key to continue or 'q' to exit --> ").lower() == "q":
+                break
         print(f"-->You can ^^see^^ {i} records from {obj_len}\n")
 
     def iterator(self):
-        obj_len = len(self.data)
-        i = 0
+        obj_len, i = len(self.data), 0
 
-        def generate_records():
-            for name, record in self.data.items():
-                yield str(record)
-
-        record_generator = generate_records()
-        while True:
-            portion = [next(record_generator, None) for _ in range(PAG)]
-            portion = [item for item in portion if item is not None]  # Исключить None (когда записи закончились)
-            i += len(portion)
-            print('\n'.join(portion))
-            if not portion or i == obj_len:
-                print(f"-->You can ^^see^^ {i} records from {obj_len}\n")
+        for page in self.pages():
+            i += len(page)
+            print('\n'.join(str(record) for record in page))
+            if i == obj_len:
                 break
             if input(f"-->You can ^^see^^ {i} records from {obj_len}\n-->press any key to continue or 'q' to exit --> ").lower() == "q":
-                break
-        
-    def find_record(self, find_string):
-        find_string = find_string.lower()
+                return
+        print(f"-->You can ^^see^^ {i} records from {obj_len}\n")
 
-        book = AddressBook()
-        for i, (name, record) in enumerate(self.data.items(), 1):
-            if find_string.isdigit():
-                for phone in record.phones:
-                    if str(phone).find(find_string) > -1:
-                        book.add_record(record)
-            else:
-                if name.lower().find(find_string) > -1:
-                    book.add_record(record)
-        return book
+    def find_record(self, find_string, limit=None, substring=False):
+        # Без substring - лише індекс (ім'я або слово імені починається з запиту)
+        find_string = find_string.casefold()
+
+        if find_string.isdigit():
+            names = list(islice(sorted(self._index("phones").find(find_string)), limit))
+            return self._subset(self.data[name] for name in names)
+
+        names = list(islice(self._index("names").find(find_string), limit))
+        if substring and (limit is None or len(names) < limit):
+            # Збіги з середини слова індекс не знаходить - на запит добираємо їх переглядом книги
+            found = set(names)
+            for name in self.data:
+                if limit is not None and len(names) >= limit:
+                    break
+                if name not in found and name.casefold().find(find_string) > -1:
+                    names.append(name)
+        return self._subset(self.data[name] for name in names)
+
+    def find_fuzzy(self, find_string, limit=None):
+        # Імена та email з помилками у запиті, найближчі збіги першими. Лише на запит:
+        # перший виклик будує FuzzyIndex по всій книзі
+        names = self._index("fuzzy").find(find_string)[:limit]
+        return self._subset(self.data[name] for name in names)
+
+    def query(self, text):
+        # name:john email:*@gmail.com birthday:06 has:address
+        return Query(text).run(self)
+
+    def explain(self, text):
+        return Query(text).explain(self)
     
     def find_birthdays(self, number):
-        book = AddressBook()
+        found = []
         try:
-            number_days = int(number)            
-            today_date = date.today()
-            chek_day  = today_date + timedelta(days=number_days)
-            for i, (name, record) in enumerate(self.data.items()):
-                if record.birthday:
-                    cheked_day = record.birthday.value.date()
-                    cheked_day = cheked_day.replace(year=today_date.year)
-                    if cheked_day < today_date:
-                        cheked_day = cheked_day.replace(year=today_date.year + 1)
-                    if cheked_day < chek_day and cheked_day > today_date:
-                        book.add_record(record)
+            number_days = int(number)
+            names = self._index("birthdays").upcoming(date.today(), number_days)
+            found = [self.data[name] for name in names]
         except ValueError:
             print(Fore.RED + "You must input number days")
         finally:
-            return book
+            return self._subset(found)
 
     @classmethod
-    def fill_AdressBook(cls):
+    def fill_AdressBook(cls, book=None):
 
-        book = cls()
+        book = cls() if book is None else book
 
         john_record1 = Record("John Black")
         john_record1.add_phone("1234567890")
@@ -148,22 +328,79 @@ class AddressBook(UserDict):
     
 
     def write_contacts_to_file(self, addressbook_filename):
-        with open(addressbook_filename, "wb") as fh:
-            pickle.dump(self, fh)
-    
+        # Без змін файл не чіпаємо; повертає True, якщо запис поставлено у чергу
+        # (чи вдався він, покаже report_save_errors)
+        self._check_saves()
+        if not self._pending and Path(addressbook_filename).exists():
+            return False
+
+        journal = Journal(addressbook_filename)
+        if (ADDRESSBOOK_STORAGE not in ("journal", "mmap")
+                or not Path(addressbook_filename).exists()
+                or self._journal_entries + len(self._pending) >= JOURNAL_COMPACT_SIZE):
+            self.compact(addressbook_filename)
+            return True
+
+        # Записи серіалізуються одразу, на диск їх дописує фоновий потік
+        count = len(self._pending)
+        frames = Journal.encode([(name, self.data.get(name)) for name in self._pending], self.generation)
+        self._track(background_writer.submit(str(Path(addressbook_filename)), lambda: journal.write(frames, count)),
+                    set(self._pending))
+        self._journal_entries += len(self._pending)
+        self._pending.clear()
+        return True
+
+    def compact(self, addressbook_filename):
+        # Повний знімок пишеться атомарно у фоні, лише потім очищається журнал; знімок замінює
+        # ще не виконані записи цього файлу. Записи копіюються тут: фоновий потік не бачить
+        # змін, зроблених після виклику, а живі записи лишаються підписаними на цю книгу.
+        # Знімок отримує нове покоління: якщо журнал не встигне очиститись, replay пропустить
+        # його старі записи
+        self.generation += 1
+        snapshot = AddressBook()
+        snapshot.generation = self.generation
+        snapshot.data = {name: copy.copy(record) for name, record in self.data.items()}
+
+        def write_snapshot():
+            atomic_dump(snapshot, addressbook_filename)
+            Journal(addressbook_filename).clear()
+
+        self._track(background_writer.submit(str(Path(addressbook_filename)), write_snapshot, replace=True),
+                    set(self._pending))
+        self._journal_entries = 0
+        self._pending.clear()
+
+    def _replay(self, journal):
+        for name, record in journal.replay(self.generation):
+            if record is not None:
+                self._put(name, record)
+            elif name in self.data:
+                self._drop(name)
+        self._journal_entries = journal.entries
+
+    @staticmethod
+    def storage_files(addressbook_filename):
+        # Файли, з яких читається книга (для перевірки, чи змінилися вони на диску)
+        return [Path(addressbook_filename), Journal(addressbook_filename).filename]
+
     @classmethod
     def read_contacts_from_file(cls, addressbook_filename):
+        background_writer.flush()
         book = cls()
+        journal = Journal(addressbook_filename)
         try:
             with open(addressbook_filename, "rb") as fh:
                 book = pickle.load(fh)
-            return book
         except:
-            print(Fore.RED + "File with recors was deleted or was never created!")
-            print(Fore.GREEN + "I created a file with a records for example!")
-            return book.fill_AdressBook()
+            if not journal.exists():
+                print(Fore.RED + "File with recors was deleted or was never created!")
+                print(Fore.GREEN + "I created a file with a records for example!")
+                return book.fill_AdressBook()
+        book._replay(journal)
+        return book
     
-    def appruve_record(self, new_record):
+    def appruve_record(self, new_record, previous_record=None):
+        # previous_record - запис, який new_record замінив під тим самим ім'ям
         print(new_record)
         print('''\nWhat You will do with this record?
 1 - Save changes
@@ -171,10 +408,14 @@ class AddressBook(UserDict):
         choise = input()
         if choise == "1":
             self.write_contacts_to_file(addressbook_filename)
-            print(Fore.GREEN + "Changes saved successful")
+            print(Fore.GREEN + "Changes are saving in background")
         elif choise == "2":
-            self.delete(new_record)
-            print(Fore.GREEN + "Changes discard successful")
+            if previous_record is not None:
+                self.add_record(previous_record)
+            else:
+                self.delete(new_record.name.value)
+            self.write_contacts_to_file(addressbook_filename)
+            print(Fore.GREEN + "Changes discarded, saving in background")
 
 
 
@@ -205,9 +446,6 @@ class AddressBook(UserDict):
                     new_name = input("Please enter new Name: ")
                     print("")
                     find_record.edit_name(new_name)
-                    if new_name != contact_name:
-                        self.add_record(find_record)
-                        self.delete(contact_name)
                 elif choice == "2":
                     while True:
                         new_phone = input("Please enter new Phone: ")
@@ -244,5 +482,5 @@ class AddressBook(UserDict):
                     find_record.edit_address(new_address) 
                 elif choice == "6":
                     self.write_contacts_to_file(addressbook_filename)
-                    print(Fore.GREEN + "\nChanges saved successful")
+                    print(Fore.GREEN + "\nChanges are saving in background")
                     break
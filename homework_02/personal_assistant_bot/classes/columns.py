@@ -0,0 +1,103 @@
+from array import array
+from collections import Counter
+from datetime import date
+from itertools import compress, repeat
+import operator
+
+
+class StringColumn:
+    """
+    Strings of one field packed in a single utf-8 buffer with offsets;
+    missing values are marked in the `present` bytemap.
+    """
+
+    def __init__(self):
+        self.offsets = array("q", [0])
+        self.present = bytearray()
+        self._parts = []
+        self._size = 0
+        self.buffer = b""
+
+    def append(self, value):
+        if value is None:
+            self.present.append(0)
+        else:
+            encoded = value.encode()
+            self._parts.append(encoded)
+            self._size += len(encoded)
+            self.present.append(1)
+        self.offsets.append(self._size)
+
+    def freeze(self):
+        self.buffer = b"".join(self._parts)
+        self._parts = []
+
+    def __len__(self):
+        return len(self.present)
+
+    def __getitem__(self, i):
+        if not self.present[i]:
+            return None
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].decode()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class ContactColumns:
+    """
+    Column snapshot of AddressBook for reports: every field is a typed array,
+    phones of all records are in one array with per-record offsets.
+    Aggregates run over whole columns with C-level builtins (sum, Counter, map).
+    """
+
+    def __init__(self):
+        self.names = StringColumn()
+        self.emails = StringColumn()
+        self.addresses = StringColumn()
+        self.phones = array("q")
+        self.phone_offsets = array("q", [0])
+        self.birthdays = array("i")
+        self.birthday_months = array("B")
+
+    @classmethod
+    def from_records(cls, records):
+        columns = cls()
+        for record in records:
+            name, phones, birthday, email, address = record.as_row()
+            columns.names.append(name)
+            columns.emails.append(email)
+            columns.addresses.append(address)
+            columns.phones.extend(phones)
+            columns.phone_offsets.append(len(columns.phones))
+            columns.birthdays.append(birthday)
+            columns.birthday_months.append(date.fromordinal(birthday).month if birthday else 0)
+        columns.names.freeze()
+        columns.emails.freeze()
+        columns.addresses.freeze()
+        return columns
+
+    def __len__(self):
+        return len(self.birthdays)
+
+    def select_names(self, mask):
+        return list(compress(self.names, mask))
+
+    def missing_email_count(self):
+        return len(self) - sum(self.emails.present)
+
+    def without_email(self):
+        return self.select_names(map(operator.not_, self.emails.present))
+
+    def birthday_distribution(self):
+        distribution = Counter(self.birthday_months)
+        distribution.pop(0, None)
+        return dict(sorted(distribution.items()))
+
+    def born_in_month(self, month):
+        return self.select_names(map(operator.eq, self.birthday_months, repeat(month)))
+
+    def phone_prefix_histogram(self, length=3):
+        prefixes = Counter(map(operator.floordiv, self.phones, repeat(10 ** (10 - length))))
+        return {f"{prefix:0{length}d}": count for prefix, count in prefixes.most_common()}
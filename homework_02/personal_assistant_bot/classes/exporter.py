@@ -0,0 +1,122 @@
+from pathlib import Path
+import csv
+import json
+
+try:
+   from classes.notes import format_time
+   from settings.settings import EXPORT_BUFFER_SIZE
+except ModuleNotFoundError:
+   from personal_assistant_bot.classes.notes import format_time
+   from personal_assistant_bot.settings.settings import EXPORT_BUFFER_SIZE
+
+
+def _vcard_escape(value):
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;").replace("\n", "\\n")
+
+
+class Exporter:
+    """
+    Writes objects one by one into a buffered text file, the format is chosen
+    by the file suffix. Subclasses define FORMATS: suffix -> writer method name.
+    """
+
+    FORMATS = {}
+
+    def export_file(self, filename):
+        filename = Path(filename)
+        writer = self.FORMATS.get(filename.suffix.lower())
+        if writer is None:
+            raise ValueError(f"Unknown export format '{filename.suffix}', use one of: {', '.join(self.FORMATS)}")
+
+        with open(filename, "w", encoding="utf-8", newline="", buffering=EXPORT_BUFFER_SIZE) as fh:
+            return getattr(self, writer)(fh)
+
+
+class ContactsExporter(Exporter):
+    FORMATS = {".csv": "write_csv", ".jsonl": "write_jsonl", ".vcf": "write_vcard"}
+
+    def __init__(self, addressbook):
+        self.addressbook = addressbook
+
+    def _rows(self):
+        for record in self.addressbook.data.values():
+            yield {
+                "name": record.name.value,
+                "phones": [phone.value for phone in record.phones],
+                "birthday": str(record.birthday) if record.birthday else None,
+                "email": record.email.value if record.email else None,
+                "address": record.address.value if record.address else None,
+            }
+
+    def write_csv(self, fh):
+        writer = csv.writer(fh)
+        writer.writerow(("name", "phones", "birthday", "email", "address"))
+        count = 0
+        for row in self._rows():
+            writer.writerow((row["name"], ";".join(row["phones"]), row["birthday"] or "", row["email"] or "", row["address"] or ""))
+            count += 1
+        return count
+
+    def write_jsonl(self, fh):
+        count = 0
+        for row in self._rows():
+            fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+    def write_vcard(self, fh):
+        count = 0
+        for row in self._rows():
+            lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{_vcard_escape(row['name'])}", f"N:;{_vcard_escape(row['name'])};;;"]
+            lines.extend(f"TEL;TYPE=CELL:{phone}" for phone in row["phones"])
+            if row["email"]:
+                lines.append(f"EMAIL:{row['email']}")
+            if row["birthday"]:
+                day, month, year = row["birthday"].split("/")
+                lines.append(f"BDAY:{year}-{month}-{day}")
+            if row["address"]:
+                lines.append(f"ADR:;;{_vcard_escape(row['address'])};;;;")
+            lines.append("END:VCARD")
+            fh.write("\r\n".join(lines) + "\r\n")
+            count += 1
+        return count
+
+
+class NotesExporter(Exporter):
+    FORMATS = {".csv": "write_csv", ".jsonl": "write_jsonl", ".md": "write_markdown"}
+
+    def __init__(self, notes):
+        self.notes = notes
+
+    def _rows(self):
+        for uid, entry in self.notes.data.items():
+            yield {"uid": uid, "text": entry.note.show_text(), "tags": entry.note.show_tags(),
+                   "created": format_time(entry.created), "modified": format_time(entry.modified)}
+
+    def write_csv(self, fh):
+        writer = csv.writer(fh)
+        writer.writerow(("uid", "text", "tags", "created", "modified"))
+        count = 0
+        for row in self._rows():
+            writer.writerow((row["uid"], row["text"], ";".join(row["tags"]), row["created"], row["modified"]))
+            count += 1
+        return count
+
+    def write_jsonl(self, fh):
+        count = 0
+        for row in self._rows():
+            fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+    def write_markdown(self, fh):
+        fh.write("# Notes\n")
+        count = 0
+        for row in self._rows():
+            tags = " ".join(f"`#{tag}`" for tag in row["tags"])
+            fh.write(f"\n## Note {row['uid']}\n\n{row['text']}\n\n")
+            if tags:
+                fh.write(f"Tags: {tags}\n\n")
+            fh.write(f"_Created: {row['created']}, modified: {row['modified']}_\n")
+            count += 1
+        return count
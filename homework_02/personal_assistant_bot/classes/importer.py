@@ -0,0 +1,167 @@
+from itertools import islice
+from pathlib import Path
+import csv
+
+try:
+   from classes.record import Record
+   from classes.record_fields import Address, Email
+   from functions.validators import parse_date, validate_email, validate_many, validate_phone
+   from settings.settings import addressbook_filename, IMPORT_BATCH_SIZE
+except ModuleNotFoundError:
+   from personal_assistant_bot.classes.record import Record
+   from personal_assistant_bot.classes.record_fields import Address, Email
+   from personal_assistant_bot.functions.validators import parse_date, validate_email, validate_many, validate_phone
+   from personal_assistant_bot.settings.settings import addressbook_filename, IMPORT_BATCH_SIZE
+
+
+VCARD_SUFFIXES = (".vcf", ".vcard")
+
+
+def _vcard_unescape(value):
+    return value.replace("\\n", " ").replace("\\N", " ").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+
+def _vcard_date(value):
+    # 1990-02-01, 19900201, 1990-02-01T00:00:00 -> 01/02/1990
+    digits = value.split("T")[0].replace("-", "")
+    if len(digits) == 8 and digits.isdigit():
+        return f"{digits[6:8]}/{digits[4:6]}/{digits[0:4]}"
+    return value
+
+
+class ContactsImporter:
+    """
+    Streaming import of contacts from CSV (name, phones, birthday, email, address;
+    phones are separated by ';') or vCard. Rows are validated batch by batch,
+    bad rows go to `errors` as (line, name, message), the book is saved once at the end.
+    """
+
+    def __init__(self, addressbook, batch_size=IMPORT_BATCH_SIZE, progress=None):
+        self.addressbook = addressbook
+        self.batch_size = batch_size
+        self.progress = progress
+        self.processed = 0
+        self.imported = 0
+        self.errors = []
+
+    def import_file(self, filename):
+        filename = Path(filename)
+        with open(filename, encoding="utf-8-sig", newline="") as fh:
+            if filename.suffix.lower() in VCARD_SUFFIXES:
+                rows = self._vcard_rows(fh)
+            else:
+                rows = self._csv_rows(fh)
+
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self._import_batch(batch)
+                if self.progress:
+                    self.progress(self.processed, self.imported, len(self.errors))
+
+        self.addressbook.write_contacts_to_file(addressbook_filename)
+        return self
+
+    @staticmethod
+    def _validate_batch(batch, field, validator):
+        # Значення поля з усіх рядків пачки - один виклик validate_many.
+        # Повертає ({номер рядка: перевірені значення}, {номер рядка: перша помилка})
+        items = []
+        for i, (_, row) in enumerate(batch):
+            values = row.get(field) or []
+            items.extend((i, value) for value in (values if isinstance(values, list) else [values]))
+
+        results, errors = validate_many(validator, [value for _, value in items])
+        failed = {}
+        for j, _, message in errors:
+            failed.setdefault(items[j][0], message)
+
+        bad = {j for j, _, _ in errors}
+        valid = {}
+        results = iter(results)
+        for j, (i, _) in enumerate(items):
+            if j not in bad:
+                valid.setdefault(i, []).append(next(results))
+        return valid, failed
+
+    def _import_batch(self, batch):
+        phones, phone_errors = self._validate_batch(batch, "phones", validate_phone)
+        birthdays, birthday_errors = self._validate_batch(batch, "birthday", parse_date)
+        emails, email_errors = self._validate_batch(batch, "email", validate_email)
+
+        records = []
+        for i, (line, row) in enumerate(batch):
+            self.processed += 1
+            name = row.get("name", "").strip()
+            error = ("Contact name is empty" if not name else
+                     phone_errors.get(i) or birthday_errors.get(i) or email_errors.get(i))
+            if error:
+                self.errors.append((line, row.get("name", ""), error))
+                continue
+
+            # Значення вже перевірені: сеттери Record приймають їх без повторної валідації і не друкують повідомлень
+            record = Record(name)
+            record.phones = phones.get(i, [])
+            if i in birthdays:
+                record.birthday = birthdays[i][0]
+            if i in emails:
+                record.email = Email.from_raw(emails[i][0])
+            if row.get("address"):
+                record.address = Address(row["address"])
+            records.append(record)
+
+        for record in records:
+            self.addressbook.add_record(record)
+        self.imported += len(records)
+
+    @staticmethod
+    def _csv_rows(fh):
+        reader = csv.DictReader(fh)
+        for row in reader:
+            row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items() if isinstance(value, str)}
+            row["phones"] = [phone.strip() for phone in row.get("phones", "").split(";") if phone.strip()]
+            yield reader.line_num, row
+
+    @staticmethod
+    def _vcard_lines(fh):
+        # Розгортання перенесених рядків: продовження починається з пробілу або табуляції
+        line_num, current = 0, None
+        for line_num, line in enumerate(fh, 1):
+            line = line.rstrip("\r\n")
+            if line[:1] in (" ", "\t") and current is not None:
+                current = (current[0], current[1] + line[1:])
+                continue
+            if current is not None:
+                yield current
+            current = (line_num, line)
+        if current is not None:
+            yield current
+
+    def _vcard_rows(self, fh):
+        row, start = None, 0
+        for line_num, line in self._vcard_lines(fh):
+            prop, _, value = line.partition(":")
+            prop = prop.split(";")[0].split(".")[-1].upper()
+
+            if prop == "BEGIN" and value.upper() == "VCARD":
+                row, start = {"phones": []}, line_num
+            elif row is None:
+                continue
+            elif prop == "END" and value.upper() == "VCARD":
+                yield start, row
+                row = None
+            elif prop == "FN":
+                row["name"] = _vcard_unescape(value).strip()
+            elif prop == "N" and not row.get("name"):
+                last, first, *_ = value.split(";") + [""]
+                row["name"] = " ".join(part for part in (_vcard_unescape(first), _vcard_unescape(last)) if part)
+            elif prop == "TEL":
+                row["phones"].append(value.strip())
+            elif prop == "EMAIL" and not row.get("email"):
+                row["email"] = value.strip()
+            elif prop == "BDAY":
+                row["birthday"] = _vcard_date(value.strip())
+            elif prop == "ADR" and not row.get("address"):
+                parts = [_vcard_unescape(part).strip() for part in value.split(";")]
+                row["address"] = ", ".join(part for part in parts if part)
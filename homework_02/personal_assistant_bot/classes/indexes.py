@@ -0,0 +1,418 @@
+from calendar import isleap, monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+
+try:
+   from settings.settings import FUZZY_DISTANCE
+except ModuleNotFoundError:
+   from personal_assistant_bot.settings.settings import FUZZY_DISTANCE
+
+
+def normalize_name(name):
+    return " ".join(name.casefold().split())
+
+
+class KeyIndex:
+    """
+    Normalized name (case-folded, single spaces) -> names of records in the book.
+    """
+
+    def __init__(self):
+        self._keys = {}
+
+    def add(self, name, record):
+        self._keys.setdefault(normalize_name(name), set()).add(name)
+
+    def remove(self, name):
+        key = normalize_name(name)
+        names = self._keys.get(key)
+        if names:
+            names.discard(name)
+            if not names:
+                del self._keys[key]
+
+    def changed(self, name, record, field, old=None, new=None):
+        pass
+
+    def get(self, name):
+        return self._keys.get(normalize_name(name), set())
+
+
+class PhoneIndex:
+    """
+    N-gram index over phone numbers: every 1..3-digit substring of a phone
+    points to the phones containing it, every phone points to its records.
+    """
+
+    GRAM = 3
+
+    def __init__(self):
+        self._grams = defaultdict(set)
+        self._owners = defaultdict(set)
+        self._phones = {}
+
+    def _ngrams(self, phone):
+        return {phone[i:i + n] for n in range(1, self.GRAM + 1) for i in range(len(phone) - n + 1)}
+
+    def _link(self, name, phone):
+        owners = self._owners[phone]
+        if not owners:
+            for gram in self._ngrams(phone):
+                self._grams[gram].add(phone)
+        owners.add(name)
+        self._phones[name].add(phone)
+
+    def _unlink(self, name, phone):
+        self._phones[name].discard(phone)
+        owners = self._owners[phone]
+        owners.discard(name)
+        if owners:
+            return
+        del self._owners[phone]
+        for gram in self._ngrams(phone):
+            postings = self._grams[gram]
+            postings.discard(phone)
+            if not postings:
+                del self._grams[gram]
+
+    def add(self, name, record):
+        self._phones[name] = set()
+        for phone in record.phones:
+            self._link(name, phone.value)
+
+    def remove(self, name):
+        for phone in list(self._phones.get(name, ())):
+            self._unlink(name, phone)
+        self._phones.pop(name, None)
+
+    def changed(self, name, record, field, old=None, new=None):
+        if field != "phones":
+            return
+        if old is None and new is None:
+            self.remove(name)
+            self.add(name, record)
+            return
+        # Один номер додано, видалено або замінено - решта n-грам не чіпаємо
+        if old is not None:
+            self._unlink(name, f"{old:010d}")
+        if new is not None:
+            self._link(name, f"{new:010d}")
+
+    def find(self, digits):
+        if len(digits) <= self.GRAM:
+            phones = self._grams.get(digits, ())
+        else:
+            # Кандидати - телефони з найрідшою n-грамою запиту, далі точна перевірка
+            grams = (digits[i:i + self.GRAM] for i in range(len(digits) - self.GRAM + 1))
+            rarest = min((self._grams.get(gram, ()) for gram in grams), key=len)
+            phones = [phone for phone in rarest if digits in phone]
+
+        names = set()
+        for phone in phones:
+            names |= self._owners[phone]
+        return names
+
+
+class Trie:
+    """
+    Prefix tree on nested dicts, values of a key are kept under "" in its node.
+    """
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, key, value):
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault("", set()).add(value)
+
+    def remove(self, key, value):
+        node, path = self._root, []
+        for char in key:
+            if char not in node:
+                return
+            path.append((node, char))
+            node = node[char]
+
+        values = node.get("")
+        if not values:
+            return
+        values.discard(value)
+        if not values:
+            del node[""]
+        for parent, char in reversed(path):
+            if parent[char]:
+                break
+            del parent[char]
+
+    def get(self, key):
+        node = self._root
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get("", set())
+
+    def prefix(self, prefix):
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return
+        yield from self._walk(node)
+
+    def _walk(self, node):
+        yield from sorted(node.get("", ()))
+        for char in sorted(node):
+            if char:
+                yield from self._walk(node[char])
+
+
+class NameIndex:
+    """
+    Case-folded names in a trie for prefix search, plus a trie of inner words
+    (surname etc.) of every name.
+    """
+
+    def __init__(self):
+        self._names = Trie()
+        self._tokens = Trie()
+
+    def add(self, name, record):
+        folded = name.casefold()
+        self._names.add(folded, name)
+        for token in set(folded.split()[1:]):
+            self._tokens.add(token, name)
+
+    def remove(self, name):
+        folded = name.casefold()
+        self._names.remove(folded, name)
+        for token in set(folded.split()[1:]):
+            self._tokens.remove(token, name)
+
+    def changed(self, name, record, field, old=None, new=None):
+        pass
+
+    def find(self, query):
+        # Ранжування: точний збіг, початок імені, початок слова всередині імені
+        query = query.casefold().strip()
+        seen = set()
+        for tier in (sorted(self._names.get(query)), self._names.prefix(query), self._tokens.prefix(query)):
+            for name in tier:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+
+class BirthdayIndex:
+    """
+    366 buckets by day of year (in a leap-year calendar) with names of records
+    whose birthday falls on that day.
+    """
+
+    FEB_29 = 59
+
+    def __init__(self):
+        self._buckets = [set() for _ in range(366)]
+        self._days = {}
+
+    @staticmethod
+    def day_of_year(month, day):
+        return date(2000, month, day).timetuple().tm_yday - 1
+
+    def add(self, name, record):
+        if record.birthday:
+            bucket = self.day_of_year(record.birthday.value.month, record.birthday.value.day)
+            self._buckets[bucket].add(name)
+            self._days[name] = bucket
+
+    def remove(self, name):
+        bucket = self._days.pop(name, None)
+        if bucket is not None:
+            self._buckets[bucket].discard(name)
+
+    def changed(self, name, record, field, old=None, new=None):
+        if field == "birthday":
+            self.remove(name)
+            self.add(name, record)
+
+    def on_day(self, month, day):
+        return set(self._buckets[self.day_of_year(month, day)])
+
+    def in_month(self, month):
+        names = set()
+        for day in range(1, monthrange(2000, month)[1] + 1):
+            names |= self._buckets[self.day_of_year(month, day)]
+        return names
+
+    def upcoming(self, today_date, number_days):
+        # Дні після сьогодні і раніше за today_date + number_days, кожен день року один раз
+        seen = {self.day_of_year(today_date.month, today_date.day)}
+        for i in range(1, min(number_days, 366)):
+            day = today_date + timedelta(days=i)
+            buckets = [self.day_of_year(day.month, day.day)]
+            if day.month == 2 and day.day == 28 and not isleap(day.year):
+                buckets.append(self.FEB_29)
+            for bucket in buckets:
+                if bucket not in seen:
+                    seen.add(bucket)
+                    yield from sorted(self._buckets[bucket])
+
+
+def edit_distance(first, second, max_distance):
+    # Damerau-Левенштейн (перестановка сусідніх літер - одна правка) з раннім виходом
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+    previous, current = None, list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+    return current[-1]
+
+
+def _bucket_add(buckets, key, value):
+    # Більшість ключів мають одне значення - зберігаємо його без set
+    bucket = buckets.get(key)
+    if bucket is None:
+        buckets[key] = value
+    elif isinstance(bucket, set):
+        bucket.add(value)
+    elif bucket != value:
+        buckets[key] = {bucket, value}
+
+
+def _bucket_remove(buckets, key, value):
+    bucket = buckets.get(key)
+    if isinstance(bucket, set):
+        bucket.discard(value)
+        if len(bucket) == 1:
+            buckets[key] = bucket.pop()
+    elif bucket == value:
+        del buckets[key]
+
+
+def _bucket_values(buckets, key):
+    bucket = buckets.get(key)
+    if bucket is None:
+        return ()
+    return bucket if isinstance(bucket, set) else (bucket,)
+
+
+class EmailIndex:
+    """
+    Case-folded email -> names and email domain -> names.
+    """
+
+    def __init__(self):
+        self._emails = {}
+        self._domains = {}
+        self._by_name = {}
+
+    def add(self, name, record):
+        if record.email:
+            email = record.email.value.casefold()
+            self._by_name[name] = email
+            _bucket_add(self._emails, email, name)
+            _bucket_add(self._domains, email.split("@")[-1], name)
+
+    def remove(self, name):
+        email = self._by_name.pop(name, None)
+        if email is not None:
+            _bucket_remove(self._emails, email, name)
+            _bucket_remove(self._domains, email.split("@")[-1], name)
+
+    def changed(self, name, record, field, old=None, new=None):
+        if field == "email":
+            self.remove(name)
+            self.add(name, record)
+
+    def get(self, email):
+        return set(_bucket_values(self._emails, email.casefold()))
+
+    def domain(self, domain):
+        return set(_bucket_values(self._domains, domain.casefold()))
+
+
+class FuzzyIndex:
+    """
+    Symmetric delete index over words of names and local parts of emails:
+    every word is stored with all its variants after up to FUZZY_DISTANCE
+    deletions (of the first PREFIX letters), a query word is expanded the same way.
+    """
+
+    PREFIX = 7
+
+    def __init__(self):
+        self._deletes = {}
+        self._terms = {}
+        self._names = {}
+
+    @staticmethod
+    def _record_terms(name, record):
+        terms = set(normalize_name(name).split())
+        if record.email:
+            terms.add(record.email.value.casefold().split("@")[0])
+        return tuple(terms)
+
+    def _variants(self, term):
+        variants = edge = {term[:self.PREFIX]}
+        for _ in range(FUZZY_DISTANCE):
+            edge = {word[:i] + word[i + 1:] for word in edge for i in range(len(word))}
+            variants = variants | edge
+        return variants
+
+    def add(self, name, record):
+        terms = self._record_terms(name, record)
+        self._names[name] = terms
+        for term in terms:
+            if term not in self._terms:
+                for variant in self._variants(term):
+                    _bucket_add(self._deletes, variant, term)
+            _bucket_add(self._terms, term, name)
+
+    def remove(self, name):
+        for term in self._names.pop(name, ()):
+            _bucket_remove(self._terms, term, name)
+            if term in self._terms:
+                continue
+            for variant in self._variants(term):
+                _bucket_remove(self._deletes, variant, term)
+
+    def changed(self, name, record, field, old=None, new=None):
+        if field == "email":
+            self.remove(name)
+            self.add(name, record)
+
+    def _match(self, word):
+        candidates = set()
+        for variant in self._variants(word):
+            candidates.update(_bucket_values(self._deletes, variant))
+
+        distances = {}
+        for term in candidates:
+            distance = edit_distance(word, term, FUZZY_DISTANCE)
+            if distance > FUZZY_DISTANCE:
+                continue
+            for name in _bucket_values(self._terms, term):
+                if distance < distances.get(name, FUZZY_DISTANCE + 1):
+                    distances[name] = distance
+        return distances
+
+    def find(self, query):
+        # Кожне слово запиту має знайтись у записі, ранг - сума відстаней
+        total = None
+        for word in normalize_name(query).split():
+            distances = self._match(word.split("@")[0])
+            if total is None:
+                total = distances
+            else:
+                total = {name: total[name] + distance for name, distance in distances.items() if name in total}
+        total = total or {}
+        return sorted(total, key=lambda name: (total[name], name))
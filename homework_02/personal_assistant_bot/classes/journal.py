@@ -0,0 +1,89 @@
+from pathlib import Path
+import os
+import pickle
+import struct
+import zlib
+
+
+class Journal:
+    """
+    Append-only log of AddressBook changes, stored next to the snapshot file.
+    Every entry is a frame: <length><crc32><pickled (generation, name, record or None)>,
+    where generation is the one of the snapshot the entry was written on top of.
+    """
+
+    FRAME_HEADER = struct.Struct("<II")
+
+    def __init__(self, snapshot_filename):
+        snapshot_filename = Path(snapshot_filename)
+        self.filename = snapshot_filename.with_name(snapshot_filename.name + ".journal")
+        self.entries = 0
+
+    def exists(self):
+        return self.filename.exists()
+
+    @classmethod
+    def encode(cls, changes, generation=0):
+        frames = []
+        for name, record in changes:
+            payload = pickle.dumps((generation, name, record))
+            frames.append(cls.FRAME_HEADER.pack(len(payload), zlib.crc32(payload)))
+            frames.append(payload)
+        return b"".join(frames)
+
+    def append(self, changes, generation=0):
+        self.write(self.encode(changes, generation), len(changes))
+
+    def write(self, frames, count):
+        with open(self.filename, "ab", buffering=0) as fh:
+            start = fh.tell()
+            try:
+                view = memoryview(frames)
+                while view:
+                    view = view[fh.write(view):]
+                os.fsync(fh.fileno())
+            except OSError:
+                # Недописані кадри прибираємо, інакше наступні записи опиняться за "обірваним" хвостом
+                os.ftruncate(fh.fileno(), start)
+                raise
+
+        self.entries += count
+
+    def replay(self, generation=0):
+        # Кінець журналу міг бути недописаний (падіння під час запису) -
+        # такий хвіст відкидаємо і обрізаємо файл до останнього цілого запису.
+        # Записи старших поколінь уже є у знімку generation (падіння між заміною знімка
+        # і очищенням журналу) - їх пропускаємо
+        self.entries = 0
+        try:
+            fh = open(self.filename, "r+b")
+        except FileNotFoundError:
+            return
+
+        with fh:
+            good_offset = 0
+            while True:
+                header = fh.read(self.FRAME_HEADER.size)
+                if len(header) < self.FRAME_HEADER.size:
+                    break
+                length, crc = self.FRAME_HEADER.unpack(header)
+                payload = fh.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                good_offset = fh.tell()
+                self.entries += 1
+                change = pickle.loads(payload)
+                if len(change) == 2:
+                    # Журнали без поколінь
+                    change = (0, *change)
+                if change[0] >= generation:
+                    yield change[1:]
+
+            if fh.seek(0, os.SEEK_END) != good_offset:
+                fh.truncate(good_offset)
+
+    def clear(self):
+        if self.filename.exists():
+            with open(self.filename, "wb") as fh:
+                os.fsync(fh.fileno())
+        self.entries = 0
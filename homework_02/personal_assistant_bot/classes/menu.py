@@ -1,15 +1,21 @@
 try:
     from classes.note import Note
-    from classes.notes import Notes
+    from classes.notes import Notes, format_time
     from classes.record import Record
     from classes.addressbook import AddressBook
+    from classes.exporter import ContactsExporter, NotesExporter
+    from classes.importer import ContactsImporter
+    from classes.session import Session
     from settings.settings import PAG, addressbook_filename, notes_filename
     from functions.functions import make_header, split_text, sort
 except ModuleNotFoundError:
     from personal_assistant_bot.classes.note import Note
-    from personal_assistant_bot.classes.notes import Notes
+    from personal_assistant_bot.classes.notes import Notes, format_time
     from personal_assistant_bot.classes.record import Record
     from personal_assistant_bot.classes.addressbook import AddressBook
+    from personal_assistant_bot.classes.exporter import ContactsExporter, NotesExporter
+    from personal_assistant_bot.classes.importer import ContactsImporter
+    from personal_assistant_bot.classes.session import Session
     from personal_assistant_bot.settings.settings import PAG, addressbook_filename, notes_filename
     from personal_assistant_bot.functions.functions import make_header, split_text, sort
 
@@ -242,6 +248,7 @@ class NotesMenu(ShowObjMenu, ObjMenuItemFunctionality):
         for item in proc_list:
             note_text = item[1].show_text()
             note_tags = item[1].show_tags()
+            created, modified = format_time(item[2]), format_time(item[3])
 
             note_tags = ", ".join(note_tags)
 
@@ -251,7 +258,7 @@ class NotesMenu(ShowObjMenu, ObjMenuItemFunctionality):
             if len(split_text(note_text)) > 1:
                 if len(split_text(note_tags)) > 1:
                     print("|{:^5}|{:<40}|{:<40}|{:^25}|{:^25}|".format(
-                        item[0], text_list[0], tags_list[0], item[2], item[3]))
+                        item[0], text_list[0], tags_list[0], created, modified))
                     for i in range(1, max(len(text_list), len(tags_list))):
                         text = text_list[i] if i < len(text_list) else ""
                         tag = tags_list[i] if i < len(tags_list) else ""
@@ -259,20 +266,20 @@ class NotesMenu(ShowObjMenu, ObjMenuItemFunctionality):
                             "", text, tag, "", ""))
                 else:
                     print("|{:^5}|{:<40}|{:<40}|{:^25}|{:^25}|".format(
-                        item[0], text_list[0], note_tags, item[2], item[3]))
+                        item[0], text_list[0], note_tags, created, modified))
                     for i in range(1, len(text_list)):
                         print("|{:^5}|{:<40}|{:<40}|{:^25}|{:^25}|".format(
                             "", text_list[i], "", "", ""))
             else:
                 if len(split_text(note_tags)) > 1:
                     print("|{:^5}|{:<40}|{:<40}|{:^25}|{:^25}|".format(
-                        item[0], note_text, tags_list[0], item[2], item[3]))
+                        item[0], note_text, tags_list[0], created, modified))
                     for i in range(1, len(tags_list)):
                         print("|{:^5}|{:<40}|{:<40}|{:^25}|{:^25}|".format(
                             "", "", tags_list[i], "", ""))
                 else:
                     print("|{:^5}|{:<40}|{:<40}|{:^25}|{:^25}|".format(
-                        item[0], note_text, note_tags, item[2], item[3]))
+                        item[0], note_text, note_tags, created, modified))
                     
             print("-" * 141)
 
@@ -300,15 +307,11 @@ class NotesMenu(ShowObjMenu, ObjMenuItemFunctionality):
             "\nDo you want to save your changes? (1 = yes / any key = no): ")
 
         if choice == "1":
-            try:
-                notesbook.save_to_file(notes_filename)
+            # Запис іде у фоні; якщо він не вдасться, помилку покаже наступний показ меню
+            notesbook.save_to_file(notes_filename)
 
-                print(Fore.GREEN + "\nChanges saved successfully!")
-                Fore.RESET
-
-            except:
-                print(Fore.RED + "\nError saving changes!")
-                Fore.RESET
+            print(Fore.GREEN + "\nChanges are saving in background!")
+            Fore.RESET
 
         if p:
             input("\nPress Enter to continue...")
@@ -329,23 +332,17 @@ class NotesMenu(ShowObjMenu, ObjMenuItemFunctionality):
 
         make_header("SORT NOTES")
 
-        sort_by = ""
+        sort_keys = {"1": ("text", "tag"), "2": ("tag", "text"), "3": ("created",), "4": ("modified",)}
         sort_revers = False
 
         choice = input(
-            "\nDo you want to sort by note text? (1 = yes / any key = no): ")
+            "\nSort by: 1 = text / 2 = first tag / 3 = created / 4 = modified / any key = cancel: ")
 
-        if choice == "1":
-            sort_by = "text"
-        else:
-            choice = input(
-                "\nDo you want to sort by note tags? (1 = yes / any key = no): ")
+        sort_by = sort_keys.get(choice)
 
-            if choice == "1":
-                sort_by = "tag"
-            else:
-                input("\nPress Enter to continue...")
-                return
+        if sort_by is None:
+            input("\nPress Enter to continue...")
+            return
 
         choice = input("\nDo you want to sort by asc? (1 = yes / any key = no): ")
 
@@ -358,12 +355,90 @@ class NotesMenu(ShowObjMenu, ObjMenuItemFunctionality):
 
         input("\nPress Enter to continue...")
 
+    def find_by_tags(self, notesbook: Notes) -> None:
+
+        make_header("FIND NOTES BY TAGS")
+
+        print("\nTop tags:")
+        for tag, count in notesbook.tag_counts()[:PAG * 5]:
+            print(f"{tag} - {count}")
+
+        tags = input("\nInput tags separated by space or press Enter to exit: ").split()
+
+        if not tags:
+            return
+
+        choice = input("\nNotes must have all these tags? (1 = yes / any key = any of them): ")
+
+        search_result = notesbook.find_by_tags(tags, match_all=(choice == "1"))
+
+        if search_result:
+            self.show_items(notesbook, notes_list=search_result)
+        else:
+            print(Fore.RED + "\nNo notes with these tags!")
+            Fore.RESET
+
+        input("\nPress Enter to continue...")
+
+    def recent_items(self, notesbook: Notes) -> None:
+
+        make_header("RECENTLY MODIFIED NOTES")
+
+        days = input("\nInput number of days or press Enter to exit: ")
+
+        if not days:
+            return
+
+        if not days.isdigit():
+            print(Fore.RED + "\nWrong number of days!")
+            Fore.RESET
+            input("\nPress Enter to continue...")
+            return
+
+        search_result = notesbook.modified_in_days(int(days))
+
+        if search_result:
+            self.show_items(notesbook, notes_list=search_result)
+        else:
+            print(Fore.RED + f"\nNo notes modified in the last {days} days!")
+            Fore.RESET
+
+        input("\nPress Enter to continue...")
+
+    def export_items(self, notesbook: Notes) -> None:
+
+        make_header("EXPORT NOTES")
+
+        filename = input("\nInput file name (.csv, .jsonl or .md) or press Enter to exit: ")
+
+        if not filename:
+            return
+
+        try:
+            count = NotesExporter(notesbook).export_file(filename)
+        except ValueError as error:
+            print(Fore.RED + f"\n{error}")
+            Fore.RESET
+        except OSError:
+            print(Fore.RED + f"\nError writing file '{filename}'!")
+            Fore.RESET
+        else:
+            print(Fore.GREEN + f"\nExported {count} notes to '{filename}'!")
+            Fore.RESET
+
+        input("\nPress Enter to continue...")
+
     def show_menu(self, notesbook: Notes) -> None:
 
         while True:
 
             make_header("NOTES MENU")
 
+            notesbook.report_save_errors()
+            if notesbook.unsaved_changes:
+                print(Fore.RED + f"\n{notesbook.unsaved_changes} unsaved changes")
+                Fore.RESET
+
             print(
                 """ 
 1. Add note
@@ -374,6 +449,9 @@ class NotesMenu(ShowObjMenu, ObjMenuItemFunctionality):
 6. Find notes
 7. Sort notes
 8. Save notes to file
+9. Export notes to CSV/JSON Lines/Markdown
+10. Tags report and find notes by tags
+11. Show notes modified in the last N days
 
 0. Exit to previous menu
 """
@@ -399,6 +477,12 @@ class NotesMenu(ShowObjMenu, ObjMenuItemFunctionality):
                 self.sort_notes(notesbook)
             elif cmd == "8":
                 self.save_changes(notesbook, p=True)
+            elif cmd == "9":
+                self.export_items(notesbook)
+            elif cmd == "10":
+                self.find_by_tags(notesbook)
+            elif cmd == "11":
+                self.recent_items(notesbook)
             else:
                 print("Wrong input!")
 
@@ -441,10 +525,13 @@ class RecordsMenu(ShowObjMenu, ObjMenuItemFunctionality):
             else:
                 break
 
+        # Запис з таким самим ім'ям буде замінено - запам'ятовуємо його, щоб "Discard" міг його повернути
+        previous_record = addresssbook.data.get(new_record.name.value)
+
         addresssbook.add_record(new_record)
         print(Fore.GREEN + "\nRecord added successful!\n")
 
-        addresssbook.appruve_record(new_record)
+        addresssbook.appruve_record(new_record, previous_record)
 
         input("\nPress Enter to continue...")
 
@@ -463,7 +550,8 @@ class RecordsMenu(ShowObjMenu, ObjMenuItemFunctionality):
         contact_name = input("\nPlease enter contact name you need to delete: ")
         print("")
 
-        addresssbook.delete(contact_name)
+        if addresssbook.delete(contact_name):
+            addresssbook.write_contacts_to_file(addressbook_filename)
 
         input("\nPress Enter to continue...")
 
@@ -482,9 +570,11 @@ class RecordsMenu(ShowObjMenu, ObjMenuItemFunctionality):
 
         make_header("SAVE ADDRESSBOOK")
 
-        addresssbook.write_contacts_to_file(addressbook_filename)
-
-        print(Fore.GREEN + "\nAddressBook saved successful!")
+        changes = addresssbook.unsaved_changes
+        if addresssbook.write_contacts_to_file(addressbook_filename):
+            print(Fore.GREEN + f"\nAddressBook is saving in background ({changes} changes)")
+        else:
+            print(Fore.GREEN + "\nNo unsaved changes, nothing to save.")
 
         input("\nPress Enter to continue...")
 
@@ -494,15 +584,37 @@ class RecordsMenu(ShowObjMenu, ObjMenuItemFunctionality):
 
         find_string = input("\nPlease input Name of record, which you want find: ")
 
-        #find_result = AddressBook()
-        find_result = addresssbook.find_record(find_string)
+        find_result = addresssbook.find_record(find_string, limit=PAG)
 
         if find_result:
             print("")
-            addresssbook.find_record(find_string).iterator_simple()
+            find_result.iterator_simple()
         else:
             print(
-                Fore.RED + f"\nI can`t find any matches with '{find_string}'")
+                Fore.RED + f"\nI can`t find any names starting with '{find_string}'")
+
+        # Повний перегляд книги (збіги з середини імені) - лише на запит
+        choice = input("\nDo you want to see all matches, also inside names? (1 = yes / any key = no): ")
+        if choice == "1":
+            find_result = addresssbook.find_record(find_string, substring=True)
+            if find_result:
+                print("")
+                find_result.iterator_simple()
+            else:
+                print(
+                    Fore.RED + f"\nI can`t find any matches with '{find_string}'")
+
+        # Пошук з урахуванням помилок будує окремий індекс по всій книзі - теж лише на запит
+        if not find_result and not find_string.isdigit():
+            choice = input("\nDo you want to try fuzzy search (names with typos)? (1 = yes / any key = no): ")
+            if choice == "1":
+                find_result = addresssbook.find_fuzzy(find_string, limit=PAG)
+                if find_result:
+                    print(Fore.GREEN + "\nFuzzy matches (closest first):")
+                    find_result.iterator_simple()
+                else:
+                    print(
+                        Fore.RED + f"\nI can`t find anything similar to '{find_string}'")
 
         input("\nPress Enter to continue...")
 
@@ -517,12 +629,105 @@ class RecordsMenu(ShowObjMenu, ObjMenuItemFunctionality):
 
         input("\nPress Enter to continue...")
 
+    def import_items(self, addresssbook: AddressBook) -> None:
+
+        make_header("IMPORT RECORDS")
+
+        filename = input("\nPlease input CSV or vCard file name or press Enter to exit: ")
+
+        if not filename:
+            return
+
+        def show_progress(processed, imported, errors):
+            print(f"\r-->Processed {processed} rows, imported {imported}, with errors {errors}", end="")
+
+        try:
+            importer = ContactsImporter(addresssbook, progress=show_progress).import_file(filename)
+        except (OSError, UnicodeDecodeError):
+            print(Fore.RED + f"\nI can`t read file '{filename}'!")
+        else:
+            print("\n")
+            for line, name, message in importer.errors[:PAG * 5]:
+                print(Fore.RED + f"Line {line} '{name}': {message}")
+            if len(importer.errors) > PAG * 5:
+                print(Fore.RED + f"... and {len(importer.errors) - PAG * 5} more rows with errors")
+            print(Fore.GREEN + f"\nImported {importer.imported} records from {importer.processed} rows!")
+
+        input("\nPress Enter to continue...")
+
+    def export_items(self, addresssbook: AddressBook) -> None:
+
+        make_header("EXPORT RECORDS")
+
+        filename = input("\nPlease input file name (.csv, .jsonl or .vcf) or press Enter to exit: ")
+
+        if not filename:
+            return
+
+        try:
+            count = ContactsExporter(addresssbook).export_file(filename)
+        except ValueError as error:
+            print(Fore.RED + f"\n{error}")
+        except OSError:
+            print(Fore.RED + f"\nI can`t write file '{filename}'!")
+        else:
+            print(Fore.GREEN + f"\nExported {count} records to '{filename}'!")
+
+        input("\nPress Enter to continue...")
+
+    def find_duplicates(self, addresssbook: AddressBook) -> None:
+
+        make_header("FIND DUPLICATES")
+
+        removed = addresssbook.dedup_phones()
+        if removed:
+            print(Fore.GREEN + f"\nRemoved {removed} repeated phones inside records")
+
+        groups = addresssbook.find_duplicates()
+
+        if groups:
+            print("\nThese records share a phone or an email:")
+            for group in groups:
+                print(" | ".join(group))
+        else:
+            print(Fore.GREEN + "\nNo duplicate records found!")
+
+        input("\nPress Enter to continue...")
+
+    def query_items(self, addresssbook: AddressBook) -> None:
+
+        make_header("QUERY RECORDS")
+
+        print("\nExample: name:john email:*@gmail.com birthday:06 has:address")
+        text = input("Please input query or press Enter to exit: ")
+
+        if not text:
+            return
+
+        try:
+            plan = addresssbook.explain(text)
+            found = addresssbook.query(text)
+        except ValueError as error:
+            print(Fore.RED + f"\n{error}")
+        else:
+            print(f"\n{plan}\n")
+            if found:
+                found.iterator_simple()
+            else:
+                print(Fore.RED + f"I can`t find any matches with '{text}'")
+
+        input("\nPress Enter to continue...")
+
     def show_menu(self, addresssbook: AddressBook) -> None:
 
         while True:
 
             make_header("ADDESSBOOK MENU")
 
+            addresssbook.report_save_errors()
+            if addresssbook.unsaved_changes:
+                print(Fore.RED + f"\n{addresssbook.unsaved_changes} unsaved changes")
+
             print(
                 """ 
 1. Add record
@@ -533,6 +738,10 @@ class RecordsMenu(ShowObjMenu, ObjMenuItemFunctionality):
 6. Find records
 7. Show records with birthday in N days
 8. Save records to file
+9. Import records from CSV/vCard
+10. Export records to CSV/JSON Lines/vCard
+11. Find duplicate records
+12. Query records (name:, phone:, email:, birthday:, has:)
 
 0. Exit to previous menu
 """
@@ -541,6 +750,9 @@ class RecordsMenu(ShowObjMenu, ObjMenuItemFunctionality):
             cmd = input("Choose an action: ")
 
             if cmd == "0":
+                if addresssbook.unsaved_changes and input(
+                        f"You have {addresssbook.unsaved_changes} unsaved changes. Save them? (y/n): ").lower() == "y":
+                    addresssbook.write_contacts_to_file(addressbook_filename)
                 return
             elif cmd == "1":
                 self.add_item(addresssbook)
@@ -558,11 +770,23 @@ class RecordsMenu(ShowObjMenu, ObjMenuItemFunctionality):
                 self.find_birthdays(addresssbook)
             elif cmd == "8":
                 self.save_changes(addresssbook)
+            elif cmd == "9":
+                self.import_items(addresssbook)
+            elif cmd == "10":
+                self.export_items(addresssbook)
+            elif cmd == "11":
+                self.find_duplicates(addresssbook)
+            elif cmd == "12":
+                self.query_items(addresssbook)
             else:
                 print("Wrong input!")
 
 class MainMenu(ShowObjMenu):
 
+    def __init__(self):
+        # Завантажені книги живуть між переходами по меню
+        self.session = Session()
+
     def show_menu(self):
 
         while True:
@@ -584,6 +808,9 @@ class MainMenu(ShowObjMenu):
             cmd = input("Choose an action: ")
 
             if cmd == "0":
+                # Перед виходом дописуємо фонові збереження і показуємо їхні помилки
+                if not self.session.report_save_errors():
+                    input("\nPress Enter to continue...")
                 return
             
             elif cmd == "1":
@@ -607,13 +834,14 @@ class MainMenu(ShowObjMenu):
                 input("\nPress Enter to continue...")
 
             elif cmd == "3":
-                addressbook = AddressBook()
-                addressbook = AddressBook.read_contacts_from_file(addressbook_filename)
+                addressbook = self.session.addressbook()
                 RecordsMenu().show_menu(addressbook)
+                self.session.addressbook_saved(addressbook)
 
             elif cmd == "4":
-                notes = Notes().load_from_file(notes_filename)
+                notes = self.session.notes()
                 NotesMenu().show_menu(notes)
+                self.session.notes_saved(notes)
 
             elif cmd == "5":
 
@@ -1,5 +1,8 @@
 class Note:
 
+    # Порядок тегів у tags - як і раніше (відсортовані при додаванні, edit_tag міняє тег на місці),
+    # _tag_set - ті самі теги для перевірки за O(1).
+    # _on_change(note) - підписка книги нотаток на зміни тексту і тегів
     def __init__(self, text="", tags=[]):
 
         if type(text) != str or type(tags) != list:
@@ -13,6 +16,38 @@ class Note:
 
         self.tags = list(set(tags))
         self.tags.sort()
+        self._tag_set = set(self.tags)
+        self._on_change = None
+
+    def __getstate__(self):
+
+        state = self.__dict__.copy()
+        state.pop("_tag_set", None)
+        state.pop("_on_change", None)
+        return state
+
+    def __setstate__(self, state):
+
+        # Старий edit_tag міг залишити повтори - прибираємо їх, порядок не змінюємо
+        self.__dict__.update(state)
+        self.tags = list(dict.fromkeys(self.tags))
+        self._tag_set = set(self.tags)
+        self._on_change = None
+
+    def __copy__(self):
+
+        # Незалежна копія для фонового збереження: власний список тегів, без підписки на зміни
+        note = Note.__new__(Note)
+        note.__dict__.update(self.__getstate__())
+        note.tags = list(self.tags)
+        note._tag_set = set(self._tag_set)
+        note._on_change = None
+        return note
+
+    def _changed(self):
+
+        if self._on_change is not None:
+            self._on_change(self)
 
     def edit_text(self, data):
 
@@ -20,6 +55,7 @@ class Note:
             raise TypeError
 
         self.text = data
+        self._changed()
 
         return self
 
@@ -29,23 +65,22 @@ class Note:
 
     def add_tags(self, data):
 
-        proc_tags = []
-
         if type(data) == str:
-            if data not in self.tags:
-                proc_tags.append(data)
-        elif type(data) == list:
-            for item in data:
-                if type(item) == str:
-                    if item not in self.tags:
-                        proc_tags.append(item)
-                else:
-                    raise TypeError
-        else:
+            data = [data]
+        elif type(data) != list:
             raise TypeError
 
-        self.tags.extend(list(set(proc_tags)))
-        self.tags.sort()
+        for item in data:
+            if type(item) != str:
+                raise TypeError
+
+        proc_tags = [item for item in dict.fromkeys(data) if item not in self._tag_set]
+
+        if proc_tags:
+            self.tags.extend(proc_tags)
+            self.tags.sort()
+            self._tag_set.update(proc_tags)
+            self._changed()
 
         return self
 
@@ -54,24 +89,37 @@ class Note:
         if type(new_tag) != str:
             raise TypeError
 
-        if current_tag in self.tags:
+        if self.is_in_tags(current_tag):
             idx = self.tags.index(current_tag)
+            self._tag_set.discard(current_tag)
+
+            if new_tag in self._tag_set:
+                del self.tags[idx]
+            else:
+                self.tags[idx] = new_tag
+                self._tag_set.add(new_tag)
 
-            self.tags[idx] = new_tag
+            self._changed()
 
         return self
 
     def remove_tags(self, data):
 
         if type(data) == str:
-            if data in self.tags:
-                self.tags.remove(data)
-        elif type(data) == list:
-            for item in data:
-                if item in self.tags:
-                    self.tags.remove(item)
-        else:
-            pass
+            data = [data]
+        elif type(data) != list:
+            return self
+
+        changed = False
+
+        for item in data:
+            if self.is_in_tags(item):
+                self.tags.remove(item)
+                self._tag_set.discard(item)
+                changed = True
+
+        if changed:
+            self._changed()
 
         return self
 
@@ -81,7 +129,10 @@ class Note:
 
     def is_in_tags(self, data):
 
-        return (data in self.tags)
+        if type(data) != str:
+            return False
+
+        return data in self._tag_set
 
     def __str__(self):
 
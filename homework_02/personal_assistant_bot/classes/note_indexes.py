@@ -0,0 +1,138 @@
+import re
+
+try:
+   from classes.indexes import Trie
+except ModuleNotFoundError:
+   from personal_assistant_bot.classes.indexes import Trie
+
+
+# Слово - літери/цифри будь-якої мови, апостроф усередині слова ("об'єм") не розриває його
+WORD = re.compile(r"\w+(?:'\w+)*")
+APOSTROPHES = str.maketrans({"’": "'", "ʼ": "'", "`": "'"})
+QUERY_TERM = re.compile(r'"([^"]*)"|(\S+)')
+OR_WORDS = ("OR", "|", "АБО")
+
+
+def tokenize(text):
+    return WORD.findall(text.casefold().translate(APOSTROPHES))
+
+
+def _has_phrase(tokens, phrase):
+    # Слова фрази йдуть поспіль, останнє слово фрази може бути початком слова
+    size = len(phrase)
+    for i in range(len(tokens) - size + 1):
+        if tokens[i:i + size - 1] == phrase[:-1] and tokens[i + size - 1].startswith(phrase[-1]):
+            return True
+    return False
+
+
+def parse_text_query(query):
+    """
+    'купити кіт OR "день народження"' -> [[["купити"], ["кіт"]], [["день", "народження"]]]:
+    groups joined by OR, every group is a list of terms (token lists) joined by AND.
+    """
+    groups, group = [], []
+    for phrase, word in QUERY_TERM.findall(query):
+        if word in OR_WORDS:
+            if group:
+                groups.append(group)
+            group = []
+            continue
+        tokens = tokenize(phrase or word)
+        if tokens:
+            group.append(tokens)
+    if group:
+        groups.append(group)
+    return groups
+
+
+class TextIndex:
+    """
+    Inverted index of words of note texts and tags: word (case-folded) -> uids,
+    kept in a trie, so a query word also matches longer words starting with it.
+    """
+
+    def __init__(self):
+        self._words = Trie()
+        self._tokens = {}
+
+    @staticmethod
+    def _note_tokens(item):
+        tokens = set(tokenize(item.note.show_text()))
+        for tag in item.note.show_tags():
+            tokens.update(tokenize(tag))
+        return tokens
+
+    def add(self, uid, item):
+        tokens = self._note_tokens(item)
+        self._tokens[uid] = tokens
+        for token in tokens:
+            self._words.add(token, uid)
+
+    def remove(self, uid):
+        for token in self._tokens.pop(uid, ()):
+            self._words.remove(token, uid)
+
+    def _term(self, tokens):
+        # Слово фрази, крім останнього, має збігтися повністю, останнє - як префікс
+        uids = None
+        for i, token in enumerate(tokens):
+            found = set(self._words.prefix(token)) if i == len(tokens) - 1 else set(self._words.get(token))
+            uids = found if uids is None else uids & found
+            if not uids:
+                break
+        return uids
+
+    def find(self, query, notes):
+        found = set()
+        for group in parse_text_query(query):
+            terms = sorted(((tokens, self._term(tokens)) for tokens in group), key=lambda term: len(term[1]))
+            uids = set.intersection(*(uids for _, uids in terms))
+            # Фрази перевіряємо лише у нотатках, що вже містять усі їх слова
+            for tokens, _ in terms:
+                if len(tokens) > 1:
+                    uids = {uid for uid in uids if self._contains_phrase(notes[uid], tokens)}
+            found |= uids
+        return found
+
+    @staticmethod
+    def _contains_phrase(item, phrase):
+        note = item.note
+        return (_has_phrase(tokenize(note.show_text()), phrase)
+                or any(_has_phrase(tokenize(tag), phrase) for tag in note.show_tags()))
+
+
+class TagIndex:
+    """
+    Tag -> uids of notes with this tag; the number of notes per tag is the size of its set.
+    """
+
+    def __init__(self):
+        self._uids = {}
+        self._tags = {}
+
+    def add(self, uid, item):
+        tags = set(item.note.show_tags())
+        self._tags[uid] = tags
+        for tag in tags:
+            self._uids.setdefault(tag, set()).add(uid)
+
+    def remove(self, uid):
+        for tag in self._tags.pop(uid, ()):
+            uids = self._uids[tag]
+            uids.discard(uid)
+            if not uids:
+                del self._uids[tag]
+
+    def all_of(self, tags):
+        # Перетин від найменшої множини до найбільшої
+        sets = sorted((self._uids.get(tag, set()) for tag in set(tags)), key=len)
+        if not sets:
+            return set()
+        return set.intersection(*sets)
+
+    def any_of(self, tags):
+        return set().union(*(self._uids.get(tag, set()) for tag in set(tags)))
+
+    def counts(self):
+        return sorted(((tag, len(uids)) for tag, uids in self._uids.items()), key=lambda count: (-count[1], count[0]))
@@ -1,77 +1,250 @@
+from bisect import bisect_left, insort
 from collections import UserDict
+from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
+from pathlib import Path
+import copy
 import pickle
+import time
 
 try:
    from classes.note import Note
+   from classes.note_indexes import TagIndex, TextIndex
+   from classes.writer import atomic_dump, background_writer
 except ModuleNotFoundError:
    from personal_assistant_bot.classes.note import Note
+   from personal_assistant_bot.classes.note_indexes import TagIndex, TextIndex
+   from personal_assistant_bot.classes.writer import atomic_dump, background_writer
+
+from colorama import init, Fore
+init(autoreset=True)
+
+DATE_FORMAT = "%d-%m-%Y, %H:%M:%S"
+
+
+def format_time(timestamp):
+    # Час зберігається в секундах epoch, у рядок переводиться лише для показу
+    return datetime.fromtimestamp(timestamp).strftime(DATE_FORMAT)
+
+
+@dataclass(slots=True)
+class NoteEntry:
+    note: Note
+    created: int
+    modified: int
+
 
 class Notes(UserDict):
 
-    uid = 1
+    # Ключі сортування для NoteEntry; нотатка без тегів має порожній перший тег і йде першою
+    SORT_KEYS = {
+        "text": lambda entry: entry.note.show_text(),
+        "tag": lambda entry: entry.note.show_tags()[0] if entry.note.show_tags() else "",
+        "created": lambda entry: entry.created,
+        "modified": lambda entry: entry.modified,
+    }
+
+    INDEXES = {"tags": TagIndex, "text": TextIndex}
 
     def __init__(self, *args):
 
         super().__init__()
 
+        # Наступний вільний uid - лічильник зберігається у файлі разом з нотатками
+        # і лише зростає, тож uid видалених нотаток повторно не видаються
+        self.uid = 1
+        self._views = {}
+        self._indexes = {}
+        # uid нотаток, змінених після останнього збереження, і фонові збереження (Future, uid)
+        self._pending = set()
+        self._saves = []
+        self._save_errors = []
+
         for item in args:
             if not isinstance(item, Note):
                 raise TypeError
             else:
-                self.data.setdefault(self.uid, []).append(item)
-                self.data[self.uid].append(datetime.now().strftime("%d-%m-%Y, %H:%M:%S"))
-                self.data[self.uid].append(datetime.now().strftime("%d-%m-%Y, %H:%M:%S"))
-                self.uid += 1
+                now = int(time.time())
+                uid = self._allocate_uid()
+                self.data[uid] = NoteEntry(item, now, now)
+                self._attach(uid)
+
+    def __getstate__(self):
+
+        # Відсортовані представлення, індекси і стан фонових збережень у файл не потрапляють
+        state = self.__dict__.copy()
+        for key in ("_views", "_indexes", "_pending", "_saves", "_save_errors"):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+
+        self.__dict__.update(state)
+        self._views = {}
+        self._indexes = {}
+        self._pending = set()
+        self.__dict__.setdefault("_saves", [])
+        self.__dict__.setdefault("_save_errors", [])
+
+        if "uid" not in state:
+            # Файли без лічильника: продовжуємо після найбільшого uid
+            self.uid = max(self.data, default=0) + 1
+
+        for uid, item in self.data.items():
+            if isinstance(item, list):
+                # Файли зі старим форматом [Note, "created", "modified"]
+                created, modified = (int(datetime.strptime(value, DATE_FORMAT).timestamp()) for value in item[1:3])
+                self.data[uid] = NoteEntry(item[0], created, modified)
+            self._attach(uid)
+
+    def _allocate_uid(self, count=1):
+
+        # Перший з count поспіль вільних uid; зайняті (напр. у пошкодженому файлі) перестрибуємо
+        while True:
+            taken = [uid for uid in range(self.uid, self.uid + count) if uid in self.data]
+            if not taken:
+                break
+            self.uid = taken[-1] + 1
+
+        uid = self.uid
+        self.uid += count
+        return uid
+
+    def _attach(self, uid):
+
+        # Зміни тексту і тегів, зроблені напряму через Note, теж оновлюють індекси
+        self.data[uid].note._on_change = partial(self._note_changed, uid)
+
+    def _detach(self, uid):
+
+        self.data[uid].note._on_change = None
+
+    def _note_changed(self, uid, note):
+
+        if uid in self.data and self.data[uid].note is note:
+            self._unindex(uid)
+            self._reindex(uid)
+            self._pending.add(uid)
+
+    def _index(self, index_name):
+
+        # Індекс будується при першому запиті і далі оновлюється разом з нотатками
+        index = self._indexes.get(index_name)
+
+        if index is None:
+            index = self.INDEXES[index_name]()
+            for uid, item in self.data.items():
+                index.add(uid, item)
+            self._indexes[index_name] = index
+
+        return index
+
+    def _sort_key(self, fields, uid):
+
+        entry = self.data[uid]
+        return tuple(self.SORT_KEYS[field](entry) for field in fields) + (uid,)
+
+    def _unindex(self, uid):
+
+        # Ключ береться збережений: нотатка на цей момент могла вже змінитися
+        for view, keys in self._views.values():
+            del view[bisect_left(view, keys.pop(uid))]
+
+        for index in self._indexes.values():
+            index.remove(uid)
+
+    def _reindex(self, uid):
+
+        for fields, (view, keys) in self._views.items():
+            keys[uid] = self._sort_key(fields, uid)
+            insort(view, keys[uid])
+
+        for index in self._indexes.values():
+            index.add(uid, self.data[uid])
 
     def add_note(self, note):
 
         if not isinstance(note, Note):
             raise TypeError
 
-        self.data.setdefault(self.uid, []).append(note)
-        self.data[self.uid].append(datetime.now().strftime("%d-%m-%Y, %H:%M:%S"))
-        self.data[self.uid].append(datetime.now().strftime("%d-%m-%Y, %H:%M:%S"))
-        self.uid += 1
+        now = int(time.time())
+        uid = self._allocate_uid()
+        self.data[uid] = NoteEntry(note, now, now)
+        self._attach(uid)
+        self._reindex(uid)
+        self._pending.add(uid)
 
         return self
 
+    def add_notes(self, notes):
+
+        # Масове додавання: uid видаються одним діапазоном, відсортовані представлення
+        # та індекси не оновлюються по одному, а перебудуються при наступному запиті
+        notes = list(notes)
+
+        for note in notes:
+            if not isinstance(note, Note):
+                raise TypeError
+
+        now = int(time.time())
+        first = self._allocate_uid(len(notes))
+        self._views.clear()
+        self._indexes.clear()
+
+        for uid, note in enumerate(notes, first):
+            self.data[uid] = NoteEntry(note, now, now)
+            self._attach(uid)
+            self._pending.add(uid)
+
+        return list(range(first, first + len(notes)))
+
     def edit_note(self, uid, new_text="", new_tags=[]):
 
         if self.data.get(uid, None):
 
+            # Кілька змін нотатки - одне оновлення індексів у кінці
+            self._detach(uid)
+            self._unindex(uid)
+
+            entry = self.data[uid]
+
             if new_text:
-                self.data[uid][0] = self.data[uid][0].edit_text(new_text)
-                self.data[uid][2] = datetime.now().strftime("%d-%m-%Y, %H:%M:%S")
+                entry.note.edit_text(new_text)
+                entry.modified = int(time.time())
 
             if new_tags:
-                old_tags = self.data[uid][0].show_tags()
-                tags_to_remove = []
+                keep_tags = set(new_tags)
+                tags_to_remove = [tag for tag in entry.note.show_tags() if tag not in keep_tags]
 
-                for tag in old_tags:
-                    if tag in new_tags:
-                        continue
-                    else:
-                       tags_to_remove.append(tag)
+                entry.note.remove_tags(tags_to_remove)
+                entry.note.add_tags(new_tags)
 
-                self.data[uid][0] = self.data[uid][0].remove_tags(tags_to_remove)
-                self.data[uid][0] = self.data[uid][0].add_tags(new_tags)
+                entry.modified = int(time.time())
 
-                self.data[uid][2] = datetime.now().strftime("%d-%m-%Y, %H:%M:%S")
+            self._attach(uid)
+            self._reindex(uid)
+            self._pending.add(uid)
 
         return self
 
     def remove_note(self, uid):
 
         if self.data.get(uid, None):
+            self._unindex(uid)
+            self._detach(uid)
             self.data.pop(uid)
+            self._pending.add(uid)
 
         return self
 
     def show_note(self, uid):
         
-        if self.data.get(uid, None):
-            return [uid, *self.data[uid]]
+        # [uid, Note, created, modified], час - секунди epoch (див. format_time)
+        entry = self.data.get(uid, None)
+
+        if entry:
+            return [uid, entry.note, entry.created, entry.modified]
         else:
             return None
 
@@ -86,60 +259,69 @@ class Notes(UserDict):
 
     def find_notes(self, find_str):
 
+        # Слова через пробіл - усі мають бути в тексті або тегах (як початок слова),
+        # "фраза в лапках" - слова поспіль, OR / АБО - будь-яка з груп
         if type(find_str) != str:
             raise TypeError
 
-        result = []
-        find_tag = False
+        if not find_str.strip():
+            return self.show_all_notes()
 
-        for key, value in self.data.items():
-            note_text = value[0].show_text()
-            note_tags = value[0].show_tags()
-
-            for tag in note_tags:
-                if tag.lower().find(find_str.lower()) != -1:
-                    result.append(self.show_note(key))
-                    find_tag = True
-                    break
-            
-            if find_tag:
-                continue
+        uids = self._index("text").find(find_str, self.data)
 
-            if note_text.lower().find(find_str.lower()) != -1:
-                result.append(self.show_note(key))
+        return [self.show_note(uid) for uid in sorted(uids)]
 
-        return result
+    def find_by_tags(self, tags, match_all=True):
+
+        # Нотатки з усіма (match_all) або з будь-яким із тегів
+        index = self._index("tags")
+        uids = index.all_of(tags) if match_all else index.any_of(tags)
+
+        return [self.show_note(uid) for uid in sorted(uids)]
+
+    def tag_counts(self):
+
+        return self._index("tags").counts()
+
+    def find_by_date(self, field="modified", start=None, end=None):
+
+        # Нотатки з created/modified у межах [start, end] (секунди epoch) - діапазон у відсортованому представленні
+        if field not in ("created", "modified"):
+            raise ValueError(f"Unknown date field '{field}'")
+
+        view = self._sorted_view((field,))
+        low = 0 if start is None else bisect_left(view, (start,))
+        high = len(view) if end is None else bisect_left(view, (end + 1,))
+
+        return [self.show_note(key[-1]) for key in view[low:high]]
+
+    def modified_in_days(self, days):
+
+        return self.find_by_date("modified", start=int(time.time()) - days * 24 * 60 * 60)
 
     def sort_notes(self, sort_by="text", revers=False):
 
-        is_sorted = False
+        # sort_by - ключ або кортеж ключів з SORT_KEYS, рівні елементи лишаються в порядку uid.
+        # Відсортований список uid кешується і далі оновлюється при add/edit/remove_note
+        fields = (sort_by,) if isinstance(sort_by, str) else tuple(sort_by)
 
-        proc_list = self.show_all_notes()
+        for field in fields:
+            if field not in self.SORT_KEYS:
+                raise ValueError(f"Unknown sort key '{field}'")
 
-        if sort_by == "text":
+        view = self._sorted_view(fields)
 
-            while not is_sorted:
-                is_sorted = True
-                for i in range(0, len(proc_list) - 1):
-                    for j in range(i + 1, len(proc_list)):
-                        if proc_list[i][1].show_text() > proc_list[j][1].show_text():
-                            proc_list[i], proc_list[j] = proc_list[j], proc_list[i]
-                            is_sorted = False
+        keys = reversed(view) if revers else view
 
-        elif sort_by == "tag":
+        return [self.show_note(key[-1]) for key in keys]
 
-            while not is_sorted:
-                is_sorted = True
-                for i in range(0, len(proc_list) - 1):
-                    for j in range(i + 1, len(proc_list)):
-                        if proc_list[i][1].show_tags()[0] > proc_list[j][1].show_tags()[0]:
-                            proc_list[i], proc_list[j] = proc_list[j], proc_list[i]
-                            is_sorted = False
+    def _sorted_view(self, fields):
 
-        if revers:
-            proc_list = proc_list[::-1]
+        if fields not in self._views:
+            keys = {uid: self._sort_key(fields, uid) for uid in self.data}
+            self._views[fields] = (sorted(keys.values()), keys)
 
-        return proc_list                
+        return self._views[fields][0]
 
     def is_note_exists(self, uid):
 
@@ -149,15 +331,59 @@ class Notes(UserDict):
         return False
 
     def save_to_file(self, notes_filename):
-        with open(notes_filename, "wb") as file:
-            pickle.dump(self, file)
+        # Копія нотаток пишеться атомарно фоновим потоком; повертає Future цього запису.
+        # Нотатки копіюються тут, живі лишаються підписаними на цю книгу
+        snapshot = Notes()
+        snapshot.uid = self.uid
+        snapshot.data = {uid: NoteEntry(copy.copy(entry.note), entry.created, entry.modified)
+                         for uid, entry in self.data.items()}
+        future = background_writer.submit(str(Path(notes_filename)), lambda: atomic_dump(snapshot, notes_filename), replace=True)
+        self._saves.append((future, set(self._pending)))
+        self._pending.clear()
+        return future
+
+    @property
+    def unsaved_changes(self):
+
+        self._check_saves()
+        return len(self._pending)
+
+    def _check_saves(self):
+
+        # Як і в AddressBook: нотатки з фонових збережень, що не вдалися, знову стають незбереженими
+        running = []
+        for future, uids in self._saves:
+            if not future.done():
+                running.append((future, uids))
+            elif future.exception() is not None:
+                self._pending |= uids
+                self._save_errors.append(future.exception())
+        self._saves = running
+
+    def report_save_errors(self):
+
+        # Помилки фонових збережень друкуються в потоці меню; True - помилок не було
+        self._check_saves()
+
+        errors, self._save_errors = self._save_errors, []
+        for error in errors:
+            print(Fore.RED + f"\nError saving notes: {error}")
+
+        return not errors
 
     def load_from_file(self, notes_filename):
 
+        background_writer.flush()
+
         try:
             with open(notes_filename, "rb") as file:
-                self = pickle.load(file)
-             
+                loaded = pickle.load(file)
+
+            # Завантажуємо стан у цей самий об'єкт: посилання на нього лишаються дійсними
+            for uid in self.data:
+                self._detach(uid)
+            self.__setstate__(loaded.__getstate__())
+
         except:
             
             self.add_note(Note("Не забути привітати товариша з днем народження",
@@ -194,7 +420,7 @@ class Notes(UserDict):
         out = ""
 
         for key, value in self.data.items():
-            out += f'id={key}, {value[0]}, created={value[1]}, last_modified={value[2]}\n'
+            out += f'id={key}, {value.note}, created={format_time(value.created)}, last_modified={format_time(value.modified)}\n'
 
         return out
 
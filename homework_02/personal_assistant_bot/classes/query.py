@@ -0,0 +1,131 @@
+from fnmatch import fnmatchcase
+import shlex
+
+try:
+   from classes.indexes import normalize_name
+   from functions.validators import normalize_phone
+except ModuleNotFoundError:
+   from personal_assistant_bot.classes.indexes import normalize_name
+   from personal_assistant_bot.functions.validators import normalize_phone
+
+
+HAS_FIELDS = ("phone", "birthday", "email", "address")
+
+
+class Condition:
+    """
+    One term of a query, e.g. name:john. `lookup` returns names from a book index
+    (or None if there is no suitable index), `match` checks a single record.
+    """
+
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value
+
+        if field == "name":
+            self.value = normalize_name(value)
+        elif field == "phone":
+            self.value = normalize_phone(value)
+            if not self.value.isdigit():
+                raise ValueError(f"Phone in query must contain digits: '{value}'")
+        elif field == "email":
+            self.value = value.casefold()
+        elif field == "birthday":
+            # MM - місяць, DD/MM - конкретний день
+            day, _, month = value.rpartition("/")
+            try:
+                self.month, self.day = int(month), int(day) if day else None
+                if not 1 <= self.month <= 12 or not 1 <= (self.day or 1) <= 31:
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f"Birthday in query must be MM or DD/MM: '{value}'") from None
+        elif field == "has":
+            if value not in HAS_FIELDS:
+                raise ValueError(f"has: must be one of {', '.join(HAS_FIELDS)}")
+        else:
+            raise ValueError(f"Unknown field '{field}' in query")
+
+    def __str__(self):
+        return f"{self.field}:{self.value}"
+
+    def lookup(self, addressbook):
+        if self.field == "name":
+            return "name index", set(addressbook._index("names").find(self.value))
+        if self.field == "phone":
+            return "phone index", addressbook._index("phones").find(self.value)
+        if self.field == "email":
+            if not any(char in self.value for char in "*?["):
+                return "email index", addressbook._index("emails").get(self.value)
+            local, _, domain = self.value.rpartition("@")
+            if local == "*" and domain and not any(char in domain for char in "*?["):
+                return "email domain index", addressbook._index("emails").domain(domain)
+            return None
+        if self.field == "birthday":
+            index = addressbook._index("birthdays")
+            if self.day is None:
+                return "birthday index (month)", index.in_month(self.month)
+            return "birthday index (day)", index.on_day(self.month, self.day)
+        return None
+
+    def match(self, record):
+        if self.field == "name":
+            folded = normalize_name(record.name.value)
+            return folded.startswith(self.value) or any(word.startswith(self.value) for word in folded.split())
+        if self.field == "phone":
+            return any(self.value in phone.value for phone in record.phones)
+        if self.field == "email":
+            return bool(record.email) and fnmatchcase(record.email.value.casefold(), self.value)
+        if self.field == "birthday":
+            birthday = record.birthday.value if record.birthday else None
+            return bool(birthday) and birthday.month == self.month and self.day in (None, birthday.day)
+        if self.field == "has":
+            return bool(record.phones if self.value == "phone" else getattr(record, self.value))
+        return False
+
+
+class Query:
+    """
+    name:john email:*@gmail.com birthday:06 has:address - all terms must match,
+    a word without field means name:. Terms with an index are resolved first
+    (smallest candidate set first), the rest filter candidates or scan the book.
+    """
+
+    def __init__(self, text):
+        self.conditions = []
+        for term in shlex.split(text):
+            field, sep, value = term.partition(":")
+            if not sep:
+                field, value = "name", term
+            self.conditions.append(Condition(field.lower(), value))
+        if not self.conditions:
+            raise ValueError("Query is empty")
+
+    def plan(self, addressbook):
+        lookups, filters = [], []
+        for condition in self.conditions:
+            found = condition.lookup(addressbook)
+            if found is None:
+                filters.append(condition)
+            else:
+                lookups.append((condition, *found))
+        lookups.sort(key=lambda lookup: len(lookup[2]))
+        return lookups, filters
+
+    def run(self, addressbook):
+        lookups, filters = self.plan(addressbook)
+        if lookups:
+            names = set.intersection(*(names for _, _, names in lookups))
+            records = (addressbook.data[name] for name in sorted(names))
+        else:
+            records = addressbook.data.values()
+        return addressbook._subset(record for record in records if all(condition.match(record) for condition in filters))
+
+    def explain(self, addressbook):
+        lookups, filters = self.plan(addressbook)
+        lines = [f"use {index} for {condition}: {len(names)} candidates" for condition, index, names in lookups]
+        if lookups:
+            lines.extend(f"filter candidates by {condition}" for condition in filters)
+        else:
+            lines.append(f"scan all {len(addressbook.data)} records")
+            lines.extend(f"filter by {condition}" for condition in filters)
+        return "\n".join(lines)
@@ -1,70 +1,171 @@
+from array import array
 from datetime import date
 
 try:
    from classes.record_fields import Address, Birthday, Email, Name, Phone
+   from functions.functions import birthday_in_year
+   from functions.validators import validate_phone
 except ModuleNotFoundError:
    from personal_assistant_bot.classes.record_fields import Address, Birthday, Email, Name, Phone
+   from personal_assistant_bot.functions.functions import birthday_in_year
+   from personal_assistant_bot.functions.validators import validate_phone
 
 from colorama import init, Fore
 init(autoreset=True)
 
 
 class Record:
+    # Поля зберігаються у внутрішньому вигляді: телефони - масив int без повторів
+    # (впорядкована множина), день народження - ordinal; об'єкти Field створюються лише при зверненні.
+    # Зміни телефонів повідомляються як ("phones", старий int або None, новий int або None),
+    # ("phones", None, None) - список змінено цілком
+    __slots__ = ("_name", "_phones", "_birthday", "_email", "_address", "_on_change", "__weakref__")
+
     def __init__(self, name):
         self.name = Name(name)
-        self.phones = []
-        self.birthday = ""
-        self.email = ""
-        self.address = ""
+        self._phones = array("q")
+        self._birthday = 0
+        self._email = None
+        self._address = None
+        self._on_change = None
+
+    @property
+    def name(self):
+        return Name.from_raw(self._name)
+
+    @name.setter
+    def name(self, name):
+        self._name = name.value
+
+    @property
+    def phones(self):
+        return [Phone.from_raw(number) for number in self._phones]
+
+    @phones.setter
+    def phones(self, phones):
+        # Повтори (напр. "067..." і "+38067...") відкидаються, порядок зберігається
+        self._phones = array("q", dict.fromkeys(int(phone) for phone in phones))
+
+    @property
+    def birthday(self):
+        return Birthday.from_raw(self._birthday) if self._birthday else ""
+
+    @birthday.setter
+    def birthday(self, birthday):
+        self._birthday = int(birthday) if birthday else 0
+
+    @property
+    def email(self):
+        return Email.from_raw(self._email) if self._email is not None else ""
+
+    @email.setter
+    def email(self, email):
+        self._email = email.value if email else None
+
+    @property
+    def address(self):
+        return Address.from_raw(self._address) if self._address is not None else ""
+
+    @address.setter
+    def address(self, address):
+        self._address = address.value if address else None
+
+    def __getstate__(self):
+        return (self._name, self._phones, self._birthday, self._email, self._address)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # Записи, збережені до __slots__
+            self.name = state["name"]
+            self.phones = state.get("phones", [])
+            self.birthday = state.get("birthday", "")
+            self.email = state.get("email", "")
+            self.address = state.get("address", "")
+        else:
+            self._name, self._phones, self._birthday, self._email, self._address = state
+            if len(set(self._phones)) != len(self._phones):
+                # Записи, збережені до того, як телефони стали множиною
+                self._phones = array("q", dict.fromkeys(self._phones))
+        self._on_change = None
+
+    def __copy__(self):
+        # Незалежна копія для фонового збереження: власний масив телефонів, без підписки на зміни
+        record = Record.__new__(Record)
+        record._name, record._phones, record._birthday = self._name, array("q", self._phones), self._birthday
+        record._email, record._address, record._on_change = self._email, self._address, None
+        return record
+
+    def as_row(self):
+        # Сирі значення полів: name, phones (array int), birthday (ordinal, 0 - немає), email, address
+        return self._name, self._phones, self._birthday, self._email, self._address
+
+    def _changed(self, field, old=None, new=None):
+        if self._on_change is not None:
+            self._on_change(self, field, old, new)
 
     def __str__(self):
-        phones_str = '; '.join(p.value for p in self.phones)
-        birthday_str = f", birthday: {self.birthday.value.strftime('%d/%m/%Y')}" if self.birthday else ""
-        email_str = f", email: {self.email}" if self.email else ""       
-        address_str = f", address: {self.address}" if self.address else ""
-        return f"Contact name: {self.name.value}, phones: {phones_str}{birthday_str}{email_str}{address_str}"
+        phones_str = '; '.join(f"{number:010d}" for number in self._phones)
+        birthday_str = f", birthday: {self.birthday}" if self._birthday else ""
+        email_str = f", email: {self._email}" if self._email is not None else ""
+        address_str = f", address: {self._address}" if self._address is not None else ""
+        return f"Contact name: {self._name}, phones: {phones_str}{birthday_str}{email_str}{address_str}"
 
     def edit_name(self, edited_name):
+        old_name = self.name.value
         self.name = Name(edited_name)
+        self._changed("name", old_name, edited_name)
         print(Fore.GREEN + f"Editing NAME to '{edited_name}' is successful!")
 
     def add_phone(self, phone):
-        self.phones.append(Phone(phone))
+        number = int(Phone(phone))
+        if number in self._phones:
+            print(Fore.RED + f"Record '{self.name}' yet have phone - '{number:010d}'")
+            return
+        self._phones.append(number)
+        self._changed("phones", None, number)
         print(Fore.GREEN + f"Adding PHONE '{phone}' is successful!")
 
+    def _phone_position(self, phone):
+        try:
+            return self._phones.index(validate_phone(phone))
+        except ValueError:
+            return -1
+
+    def dedup_phones(self):
+        unique = list(dict.fromkeys(self._phones))
+        removed = len(self._phones) - len(unique)
+        if removed:
+            self._phones = array("q", unique)
+            self._changed("phones")
+        return removed
+
     def remove_phone(self, phone):
-        for i in self.phones:
-            if phone == i.value:
-                self.phones.remove(i)
-                print(Fore.GREEN + f"Removing PHONE '{phone}' is successful!")
-                return True
+        i = self._phone_position(phone)
+        if i > -1:
+            number = self._phones.pop(i)
+            self._changed("phones", number, None)
+            print(Fore.GREEN + f"Removing PHONE '{phone}' is successful!")
+            return True
         raise ValueError(Fore.RED + 'Incorrect number. Reinput, please')
 
     def edit_phone(self, old_phone, edited_phone):
-        cash_phones = []
-        for i in self.phones:
-            cash_phones.append(i.value)
-        if old_phone in cash_phones:
-            new_phones = []
-            for i in self.phones:
-                if i.value == old_phone:
-                    new_phones.append(Phone(edited_phone))
-                else:
-                    new_phones.append(Phone(i.value))
-            self.phones = new_phones
+        # Заміна на місці: перевіряється лише новий номер, індекси отримують (старий, новий)
+        i = self._phone_position(old_phone)
+        if i > -1:
+            number, old_number = int(Phone(edited_phone)), self._phones[i]
+            if number != old_number and number in self._phones:
+                raise ValueError(Fore.RED + f"Record '{self.name}' yet have phone - '{number:010d}'")
+            self._phones[i] = number
+            self._changed("phones", old_number, number)
             print(Fore.GREEN + f"Editing PHONE to '{edited_phone}' is successful!")
             return True
         else: 
             raise ValueError(Fore.RED + 'Incorrect number. Reinput, please')
 
     def find_phone(self, phone):
-        cash_phones = []
-        for i in self.phones:
-            cash_phones.append(i.value)
-        if phone in cash_phones:
-            for i in self.phones:
-                if phone == i.value:
-                    return i
+        i = self._phone_position(phone)
+        if i > -1:
+            return Phone.from_raw(self._phones[i])
         else:
             print(Fore.RED + f"Phone number '{phone}' didn't find!")
             return None
@@ -72,12 +173,15 @@ class Record:
     def add_birthday(self, birthday):
         if not self.birthday:
             self.birthday = Birthday(birthday)
+            self._changed("birthday", None, self.birthday.value)
             print(Fore.GREEN + f"Adding BIRTHDAY '{birthday}' is successful!")
         else:
             print(Fore.RED + f"Record '{self.name}' yet have field birthday - '{self.birthday.value.strftime('%d/%m/%Y')}'")
 
     def edit_birthday(self, new_birthday):
+        old_birthday = self.birthday.value if self.birthday else None
         self.birthday = Birthday(new_birthday)
+        self._changed("birthday", old_birthday, self.birthday.value)
         print(Fore.GREEN + f"Editing BIRTHDAY to '{new_birthday}' is successful!")
 
     def delete_birthday(self): #в завданні відсутній, але потрібний для консистентності
@@ -87,44 +191,55 @@ class Record:
         if not self.birthday:
             return Fore.RED + f"Record '{self.name}' saved without birthday"
         today_date = date.today()
-        birthday_date = date(today_date.year, self.birthday.value.month, self.birthday.value.day)
+        month, day = self.birthday.value.month, self.birthday.value.day
+        birthday_date = birthday_in_year(month, day, today_date.year)
         if birthday_date < today_date:
-            birthday_date = birthday_date.replace(year=today_date.year + 1)
+            birthday_date = birthday_in_year(month, day, today_date.year + 1)
         delta = birthday_date - today_date
         return delta.days
 
     def add_email(self, email):
         if not self.email:
             self.email = Email(email)
+            self._changed("email", None, email)
             print(Fore.GREEN + f"Adding EMAIL '{email}' is successful!")
         else:
             print(Fore.RED + f"Record '{self.name}' yet have field email - '{self.email.value}'")
 
     def edit_email(self, new_email):
+        old_email = self.email.value if self.email else None
         self.email = Email(new_email)
+        self._changed("email", old_email, new_email)
         print(Fore.GREEN + f"Editing EMAIL to '{new_email}' is successful!")
 
     def remove_email(self):
         if self.email:
-            self.email = Email("")
-            print(Fore.GREEN + f"Removing EMAIL '{self.email}' is successful!")
+            old_email = self.email.value
+            self.email = ""
+            self._changed("email", old_email, None)
+            print(Fore.GREEN + f"Removing EMAIL '{old_email}' is successful!")
         else:
             print(Fore.RED + f"Record '{self.name}' don't have field email!")
 
     def add_address(self, address):
         if not self.address:
             self.address = Address(address)
+            self._changed("address", None, address)
             print(Fore.GREEN + f"Adding ADDRESS '{address}' is successful!")
         else:
             print(Fore.RED + f"Record '{self.name}' yet have field address - '{self.address.value}'")
 
     def edit_address(self, new_address):
+        old_address = self.address.value if self.address else None
         self.address = Address(new_address)
+        self._changed("address", old_address, new_address)
         print(Fore.GREEN + f"Editing ADDRESS to '{new_address}' is successful!")
 
     def remove_address(self):
         if self.address:
-            del self.address
-            print(Fore.GREEN + f"Removing ADDRESS '{self.address}' is successful!")
+            old_address = self.address.value
+            self.address = ""
+            self._changed("address", old_address, None)
+            print(Fore.GREEN + f"Removing ADDRESS '{old_address}' is successful!")
         else:
             print(Fore.RED + f"Record '{self.name}' don't have field address!")
\ No newline at end of file
@@ -1,79 +1,105 @@
-import re
 from datetime import datetime
 
-from colorama import init, Fore
+try:
+   from functions.validators import parse_date, validate_email, validate_phone
+except ModuleNotFoundError:
+   from personal_assistant_bot.functions.validators import parse_date, validate_email, validate_phone
+
+from colorama import init
 init(autoreset=True)
 
 class Field:
+    __slots__ = ("_value",)
 
     def __init__(self, value):
         self.value = value
 
+    @classmethod
+    def from_raw(cls, raw):
+        # Обгортка над вже перевіреним внутрішнім значенням, без повторної валідації
+        field = cls.__new__(cls)
+        field._value = raw
+        return field
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    def __getstate__(self):
+        return (self._value,)
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple) and len(state) == 2 and isinstance(state[1], dict):
+            state = {**(state[0] or {}), **state[1]}
+        if isinstance(state, dict):
+            # Об'єкти, збережені до __slots__, мали __dict__ з одним значенням
+            self.value = next(iter(state.values()))
+        else:
+            self._value = state[0]
+
     def __str__(self):
         return str(self.value)
 
 
 class Name(Field):
-    pass
+    __slots__ = ()
 
 
 class Phone(Field):
-
-    def __init__(self, value):
-        self.__value = None
-        self.value = value
+    __slots__ = ()
 
     @property
     def value(self):
-        return self.__value
+        return f"{self._value:010d}"
 
     @value.setter
     def value(self, value):
-        if len(value) != 10 or not value.isdigit():
-            raise ValueError(
-                Fore.RED + 'Incorrect number format. Please enter a 10-digit number.')
-        self.__value = value
+        # Звичайний випадок - рівно 10 цифр - без виклику нормалізації
+        if len(value) == 10 and value.isdigit():
+            self._value = int(value)
+        else:
+            self._value = validate_phone(value)
+
+    def __int__(self):
+        return self._value
 
 
 class Email(Field):
-    def __init__(self, value):
-        super().__init__(value)
-        self.__value = None
-        self.value = value
+    __slots__ = ()
 
     @property
     def value(self):
-        return self.__value
+        return self._value
 
     @value.setter
     def value(self, value):
-        pattern = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-        if not re.match(pattern, value):
-            raise ValueError(
-                Fore.RED + 'Incorrect email format. Please enter email like user@example.com.')
-        self.__value = value
+        self._value = validate_email(value)
 
 
 class Address(Field):
-    pass
+    __slots__ = ()
 
 
 class Birthday(Field):
-    def __init__(self, value):
-        self.__value = None
-        self.value = value
+    __slots__ = ()
 
     @property
     def value(self):
-        return self.__value
+        return datetime.fromordinal(self._value)
 
     @value.setter
     def value(self, value):
-        if not datetime.strptime(value, "%d/%m/%Y"):
-            raise ValueError(
-                Fore.RED + 'Waiting format of date - DD/MM/YYYY. Reinput, please')
+        if isinstance(value, datetime):
+            self._value = value.toordinal()
         else:
-            self.__value = datetime.strptime(value, "%d/%m/%Y")
+            self._value = parse_date(value)
+
+    def __int__(self):
+        return self._value
 
     def __str__(self):
         return self.value.strftime('%d/%m/%Y')
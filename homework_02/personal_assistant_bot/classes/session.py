@@ -0,0 +1,95 @@
+from pathlib import Path
+
+try:
+   from classes.addressbook import AddressBook
+   from classes.notes import Notes
+   from classes.snapshot import MappedAddressBook
+   from classes.sqlite_addressbook import SQLiteAddressBook
+   from classes.writer import background_writer
+   from settings.settings import addressbook_filename, notes_filename, ADDRESSBOOK_STORAGE
+except ModuleNotFoundError:
+   from personal_assistant_bot.classes.addressbook import AddressBook
+   from personal_assistant_bot.classes.notes import Notes
+   from personal_assistant_bot.classes.snapshot import MappedAddressBook
+   from personal_assistant_bot.classes.sqlite_addressbook import SQLiteAddressBook
+   from personal_assistant_bot.classes.writer import background_writer
+   from personal_assistant_bot.settings.settings import addressbook_filename, notes_filename, ADDRESSBOOK_STORAGE
+
+
+class Session:
+    """
+    Keeps the loaded AddressBook and Notes for the whole program run. A book is
+    read again only if its files changed on disk (mtime or size) since it was
+    loaded or last saved by us; a book with unsaved changes is never replaced.
+    """
+
+    def __init__(self):
+        self._books = {}
+
+    @staticmethod
+    def _signature(files):
+        signature = []
+        for filename in files:
+            try:
+                stat = Path(filename).stat()
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _get(self, key, files, load, keep=lambda book: False):
+        cached = self._books.get(key)
+        if cached is not None:
+            book, signature = cached
+            # signature None - наше збереження ще пишеться, у пам'яті найновіший стан
+            if keep(book) or signature is None or signature == self._signature(files):
+                return book
+            self._close(book)
+
+        book = load()
+        self._books[key] = (book, self._signature(files))
+        return book
+
+    @staticmethod
+    def _close(book):
+        # Замінена книга звільняє mmap-файл або з'єднання з базою, якщо вони є
+        close = getattr(book.data, "close", None)
+        if close is not None:
+            close()
+
+    def saved(self, key, book, files):
+        # Після власних збережень запам'ятовуємо новий стан файлів, щоб не читати їх повторно.
+        # Writer виконує завдання по черзі, тож підпис знімається після вже поставлених записів
+        self._books[key] = (book, None)
+
+        def remember():
+            if self._books.get(key, (None,))[0] is book:
+                self._books[key] = (book, self._signature(files))
+
+        background_writer.submit(f"session:{key}", remember, replace=True)
+
+    def report_save_errors(self):
+        # При виході з програми: дочікуємось фонових збережень і друкуємо їхні помилки
+        background_writer.flush()
+        reported = [book.report_save_errors() for book, _ in self._books.values()]
+        return all(reported)
+
+    def addressbook_class(self):
+        return {"sqlite": SQLiteAddressBook, "mmap": MappedAddressBook}.get(ADDRESSBOOK_STORAGE, AddressBook)
+
+    def addressbook(self):
+        book_class = self.addressbook_class()
+        return self._get("addressbook", book_class.storage_files(addressbook_filename),
+                         lambda: book_class.read_contacts_from_file(addressbook_filename),
+                         keep=lambda book: book.unsaved_changes)
+
+    def addressbook_saved(self, addressbook):
+        self.saved("addressbook", addressbook, self.addressbook_class().storage_files(addressbook_filename))
+
+    def notes(self):
+        return self._get("notes", [notes_filename], lambda: Notes().load_from_file(notes_filename),
+                         keep=lambda notes: notes.unsaved_changes)
+
+    def notes_saved(self, notes):
+        self.saved("notes", notes, [notes_filename])
@@ -0,0 +1,384 @@
+from array import array
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from heapq import merge
+from operator import itemgetter
+from pathlib import Path
+import copy
+import mmap
+import struct
+import sys
+import threading
+import weakref
+
+try:
+   from classes.addressbook import AddressBook
+   from classes.journal import Journal
+   from classes.record import Record
+   from classes.writer import atomic_write, background_writer
+   from settings.settings import addressbook_filename
+except ModuleNotFoundError:
+   from personal_assistant_bot.classes.addressbook import AddressBook
+   from personal_assistant_bot.classes.journal import Journal
+   from personal_assistant_bot.classes.record import Record
+   from personal_assistant_bot.classes.writer import atomic_write, background_writer
+   from personal_assistant_bot.settings.settings import addressbook_filename
+
+from colorama import init, Fore
+init(autoreset=True)
+
+
+# Формат знімка, версія 2 (little-endian):
+#   заголовок: magic, версія, кількість записів, зміщення купи рядків, покоління знімка
+#   (у версії 1 покоління немає, воно вважається 0)
+#   заголовки записів фіксованого розміру, відсортовані за ім'ям:
+#     ім'я (зміщення, довжина), телефони (зміщення, кількість int64), день народження (ordinal, 0 - немає),
+#     email (зміщення, довжина), адреса (зміщення, довжина); довжина -1 - поля немає
+#   купа: utf-8 рядки і масиви телефонів, зміщення відраховуються від її початку
+MAGIC = b"PABSNAP\0"
+VERSION = 2
+HEADER_V1 = struct.Struct("<8sIIQ")
+HEADER = struct.Struct("<8sIIQQ")
+RECORD = struct.Struct("<QIQIiQiQi")
+
+
+def snapshot_filename(addressbook_filename):
+    return Path(addressbook_filename).with_suffix(".snap")
+
+
+def write_snapshot(fh, count, records, generation=0):
+    """
+    Writes `count` (name, Record) pairs, sorted by name, into an open binary file.
+    """
+    heap_offset = HEADER.size + count * RECORD.size
+    headers = bytearray()
+    position = 0
+
+    def put(data):
+        nonlocal position
+        fh.write(data)
+        position += len(data)
+        return position - len(data)
+
+    def put_string(value):
+        if value is None:
+            return 0, -1
+        encoded = value.encode()
+        return put(encoded), len(encoded)
+
+    fh.seek(heap_offset)
+    written = 0
+    for name, record in records:
+        _, phones, birthday, email, address = record.as_row()
+        phones = array("q", phones)
+        if sys.byteorder == "big":
+            phones.byteswap()
+        name_offset, name_length = put_string(name)
+        headers += RECORD.pack(name_offset, name_length, put(phones.tobytes()), len(phones), birthday,
+                               *put_string(email), *put_string(address))
+        written += 1
+
+    if written != count:
+        raise RuntimeError(f"Snapshot expected {count} records, got {written}")
+    fh.seek(0)
+    fh.write(HEADER.pack(MAGIC, VERSION, count, heap_offset, generation))
+    fh.write(headers)
+
+
+class SnapshotRecordStore(MutableMapping):
+    """
+    Mapping name -> Record over a memory-mapped snapshot. Records are decoded
+    only on access; added, changed and deleted (None) records are kept in `overlay`.
+    The map and the overlay are changed under `_lock`: compaction swaps the file
+    (see `released`) from the background writer.
+    """
+
+    def __init__(self, filename, on_load=None):
+        self._filename = filename
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._closed = False
+        self._open()
+        self.overlay = {}
+        self.on_load = on_load
+        self._len = self._count
+        self._live = weakref.WeakValueDictionary()
+
+    def _open(self):
+        with open(self._filename, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count, self._heap = HEADER_V1.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"'{self._filename}' is not an addressbook snapshot")
+        if version == 1:
+            self._records, self.generation = HEADER_V1.size, 0
+        elif version == VERSION:
+            self._records, self.generation = HEADER.size, HEADER.unpack_from(self._map, 0)[-1]
+        else:
+            self._map.close()
+            raise ValueError(f"Unsupported snapshot version {version} in '{self._filename}'")
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._map.close()
+
+    @contextmanager
+    def released(self, written=None):
+        # Файл знімка не можна замінити, поки він відображений у пам'ять (Windows):
+        # закриваємо mmap на час заміни і відкриваємо те, що лишилось на диску.
+        # Усі зміни вже є в overlay, тож новий вміст файлу нічого не змінює для читача.
+        # written - копія (copy()), з якої записано новий файл: її зміни з overlay прибираємо
+        with self._lock:
+            self._map.close()
+            replaced = False
+            try:
+                yield
+                replaced = True
+            finally:
+                if not self._closed:
+                    self._open()
+                    self._generation += 1
+                    if replaced and written is not None:
+                        self._prune(written)
+
+    def _prune(self, written):
+        # Лишаємо в overlay лише те, що змінилось після копіювання (не збігається з записаним у файл)
+        for name, record in written.overlay.items():
+            if name not in self.overlay:
+                continue
+            current = self.overlay[name]
+            if current is None and record is None or (
+                    current is not None and record is not None and current.as_row() == record.as_row()):
+                del self.overlay[name]
+
+    def copy(self):
+        # Знімок для фонового запису: копія overlay з копіями записів. Власний mmap
+        # відкривається лише на час запису (opened) - тоді файл знімка, який вже могла замінити
+        # попередня компакція; разом з overlay він дає той самий стан, що й на момент копіювання
+        with self._lock:
+            store = copy.copy(self)
+            store.overlay = {name: None if record is None else copy.copy(record) for name, record in self.overlay.items()}
+        store._lock = threading.RLock()
+        store._map = None
+        store._generation = 0
+        store._closed = False
+        store.on_load = None
+        store._live = weakref.WeakValueDictionary()
+        return store
+
+    @contextmanager
+    def opened(self):
+        with self._lock:
+            self._open()
+            try:
+                yield self
+            finally:
+                self._map.close()
+
+    def _string(self, offset, length):
+        if length < 0:
+            return None
+        start = self._heap + offset
+        return self._map[start:start + length].decode()
+
+    def _name_at(self, i):
+        with self._lock:
+            name_offset, name_length = RECORD.unpack_from(self._map, self._records + i * RECORD.size)[:2]
+            return self._string(name_offset, name_length)
+
+    def _bisect(self, name):
+        # Перший індекс з ім'ям не меншим за name
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_at(middle) < name:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _position(self, name):
+        with self._lock:
+            low = self._bisect(name)
+            return low if low < self._count and self._name_at(low) == name else -1
+
+    def _load(self, i, name):
+        record = self._live.get(name)
+        if record is None:
+            with self._lock:
+                (name_offset, name_length, phones_offset, phones_count, birthday,
+                 email_offset, email_length, address_offset, address_length) = RECORD.unpack_from(
+                    self._map, self._records + i * RECORD.size)
+                phones = array("q")
+                start = self._heap + phones_offset
+                phones.frombytes(self._map[start:start + phones_count * phones.itemsize])
+                state = (self._string(name_offset, name_length), phones, birthday,
+                         self._string(email_offset, email_length), self._string(address_offset, address_length))
+            if sys.byteorder == "big":
+                phones.byteswap()
+            record = Record.__new__(Record)
+            record.__setstate__(state)
+            if self.on_load:
+                self.on_load(record)
+            self._live[name] = record
+        return record
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name in self.overlay:
+                record = self.overlay[name]
+                if record is None:
+                    raise KeyError(name)
+                return record
+            record = self._live.get(name)
+            if record is not None:
+                return record
+            i = self._position(name)
+            if i < 0:
+                raise KeyError(name)
+            return self._load(i, name)
+
+    def __setitem__(self, name, record):
+        with self._lock:
+            if name not in self:
+                self._len += 1
+            self.overlay[name] = record
+            self._live[name] = record
+
+    def __delitem__(self, name):
+        with self._lock:
+            if name not in self:
+                raise KeyError(name)
+            self.overlay[name] = None
+            self._live.pop(name, None)
+            self._len -= 1
+
+    def __contains__(self, name):
+        with self._lock:
+            if name in self.overlay:
+                return self.overlay[name] is not None
+            return self._position(name) >= 0
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for name, _ in self.items(decode=False):
+            yield name
+
+    def _base_items(self, decode=True, skip=()):
+        # Записи знімка в порядку файлу (за ім'ям), змінені беруться з overlay. Якщо файл
+        # замінено під час обходу (compact), обхід продовжується після останнього імені
+        i, last, generation = 0, None, self._generation
+        while True:
+            with self._lock:
+                if self._generation != generation:
+                    generation = self._generation
+                    i = 0 if last is None else self._bisect(last)
+                    if i < self._count and self._name_at(i) == last:
+                        i += 1
+                if i >= self._count:
+                    return
+                name = last = self._name_at(i)
+                i += 1
+                if name in skip:
+                    continue
+                if name in self.overlay:
+                    record = self.overlay[name]
+                    if record is None:
+                        continue
+                else:
+                    record = self._load(i - 1, name) if decode else None
+            yield name, record
+
+    def _added(self):
+        with self._lock:
+            return [name for name, record in self.overlay.items() if record is not None and self._position(name) < 0]
+
+    def items(self, decode=True):
+        # Додані записи визначаються до обходу: після compact вони вже будуть у файлі,
+        # а не в overlay, тож беремо їх звичайним пошуком
+        added = self._added()
+        yield from self._base_items(decode, skip=set(added))
+        for name in added:
+            if name in self:
+                yield name, self[name] if decode else None
+
+    def values(self):
+        for _, record in self.items():
+            yield record
+
+    def sorted_items(self):
+        base = ((name, self._load(i, name)) for i, name in enumerate(map(self._name_at, range(self._count)))
+                if name not in self.overlay)
+        changed = sorted((name, record) for name, record in self.overlay.items() if record is not None)
+        return merge(base, changed, key=itemgetter(0))
+
+
+class MappedAddressBook(AddressBook):
+    """
+    AddressBook over a read-only memory-mapped snapshot plus the change journal:
+    opening is a header read, records are decoded when touched, and the pages
+    are shared with other processes through the page cache.
+    """
+
+    def __init__(self, filename=None):
+        super().__init__()
+        self.filename = snapshot_filename(filename or addressbook_filename)
+        self.data = SnapshotRecordStore(self.filename, on_load=self._attach)
+        self.generation = self.data.generation
+
+    def __getstate__(self):
+        raise TypeError("MappedAddressBook is stored as a snapshot, not pickled")
+
+    def _record_changed(self, record, field, old, new):
+        super()._record_changed(record, field, old, new)
+        if field != "name":
+            self.data[record.name.value] = record
+
+    def write_contacts_to_file(self, addressbook_filename=None):
+        return super().write_contacts_to_file(self.filename)
+
+    def compact(self, addressbook_filename=None):
+        # Нове покоління знімка - див. AddressBook.compact
+        self.generation += 1
+        snapshot = self.data.copy()
+        count, generation = len(snapshot), self.generation
+
+        def write_file(fh):
+            with snapshot.opened():
+                write_snapshot(fh, count, snapshot.sorted_items(), generation)
+
+        def write():
+            atomic_write(self.filename, write_file, around_replace=lambda: self.data.released(snapshot))
+            Journal(self.filename).clear()
+
+        self._track(background_writer.submit(str(self.filename), write, replace=True), set(self._pending))
+        self._journal_entries = 0
+        self._pending.clear()
+
+    @staticmethod
+    def storage_files(addressbook_filename):
+        filename = snapshot_filename(addressbook_filename)
+        return [filename, Journal(filename).filename]
+
+    @classmethod
+    def read_contacts_from_file(cls, addressbook_filename):
+        background_writer.flush()
+        filename = snapshot_filename(addressbook_filename)
+        if not filename.exists():
+            # Одноразове перетворення pickle-файлу у знімок
+            source = {}
+            if Path(addressbook_filename).exists():
+                source = AddressBook.read_contacts_from_file(addressbook_filename).data
+            atomic_write(filename, lambda fh: write_snapshot(fh, len(source), sorted(source.items())))
+            if not source:
+                print(Fore.RED + "File with recors was deleted or was never created!")
+                print(Fore.GREEN + "I created a file with a records for example!")
+                return cls.fill_AdressBook(cls(addressbook_filename))
+
+        book = cls(addressbook_filename)
+        book._replay(Journal(book.filename))
+        return book
@@ -0,0 +1,239 @@
+from calendar import isleap
+from collections.abc import MutableMapping
+from datetime import date, timedelta
+from pathlib import Path
+import pickle
+import sqlite3
+import weakref
+
+try:
+   from classes.addressbook import AddressBook
+   from classes.indexes import normalize_name
+   from classes.writer import background_writer
+   from settings.settings import addressbook_filename, NORMALIZED_NAMES
+except ModuleNotFoundError:
+   from personal_assistant_bot.classes.addressbook import AddressBook
+   from personal_assistant_bot.classes.indexes import normalize_name
+   from personal_assistant_bot.classes.writer import background_writer
+   from personal_assistant_bot.settings.settings import addressbook_filename, NORMALIZED_NAMES
+
+from colorama import init, Fore
+init(autoreset=True)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    name TEXT PRIMARY KEY,
+    name_lower TEXT NOT NULL,
+    email TEXT,
+    birthday_md INTEGER,
+    record BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phones (
+    digits TEXT NOT NULL,
+    name TEXT NOT NULL REFERENCES records(name) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS records_name_lower ON records(name_lower);
+CREATE INDEX IF NOT EXISTS records_email ON records(email);
+CREATE INDEX IF NOT EXISTS records_birthday_md ON records(birthday_md);
+CREATE INDEX IF NOT EXISTS phones_digits ON phones(digits);
+CREATE INDEX IF NOT EXISTS phones_name ON phones(name);
+"""
+
+
+def sqlite_filename(addressbook_filename):
+    return Path(addressbook_filename).with_suffix(".sqlite")
+
+
+class SQLiteRecordStore(MutableMapping):
+    """
+    Mapping name -> Record, that keeps records in SQLite instead of memory.
+    Records are unpickled only on access; live objects are shared while in use.
+    """
+
+    def __init__(self, filename, on_load=None):
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+        self.on_load = on_load
+        self._live = weakref.WeakValueDictionary()
+
+    def _load(self, name, blob):
+        record = self._live.get(name)
+        if record is None:
+            record = pickle.loads(blob)
+            if self.on_load:
+                self.on_load(record)
+            self._live[name] = record
+        return record
+
+    def __getitem__(self, name):
+        record = self._live.get(name)
+        if record is not None:
+            return record
+        row = self.connection.execute(
+            "SELECT record FROM records WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return self._load(name, row[0])
+
+    def __setitem__(self, name, record):
+        birthday = record.birthday.value if record.birthday else None
+        self.connection.execute(
+            "INSERT OR REPLACE INTO records (name, name_lower, email, birthday_md, record) VALUES (?, ?, ?, ?, ?)",
+            (name, normalize_name(name),
+             record.email.value if record.email else None,
+             birthday.month * 100 + birthday.day if birthday else None,
+             pickle.dumps(record)))
+        self.connection.execute("DELETE FROM phones WHERE name = ?", (name,))
+        self.connection.executemany(
+            "INSERT INTO phones (digits, name) VALUES (?, ?)",
+            [(phone.value, name) for phone in record.phones])
+        self._live[name] = record
+
+    def __delitem__(self, name):
+        cursor = self.connection.execute("DELETE FROM records WHERE name = ?", (name,))
+        self._live.pop(name, None)
+        if cursor.rowcount == 0:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        return self.connection.execute(
+            "SELECT 1 FROM records WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        for (name,) in self.connection.execute("SELECT name FROM records ORDER BY rowid"):
+            yield name
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def items(self):
+        for name, blob in self.connection.execute("SELECT name, record FROM records ORDER BY rowid"):
+            yield name, self._load(name, blob)
+
+    def values(self):
+        for _, record in self.items():
+            yield record
+
+    def select(self, where, params=(), order="rowid", order_params=(), limit=None, offset=0):
+        query = f"SELECT name, record FROM records WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?"
+        for name, blob in self.connection.execute(
+                query, (*params, *order_params, -1 if limit is None else limit, offset)):
+            yield self._load(name, blob)
+
+    def names_by_phone(self, digits):
+        # Точний номер шукається по індексу, частина номера - по таблиці phones
+        if len(digits) == 10:
+            query = "SELECT DISTINCT name FROM phones WHERE digits = ?"
+        else:
+            query = "SELECT DISTINCT name FROM phones WHERE instr(digits, ?) > 0"
+        return [name for (name,) in self.connection.execute(query, (digits,))]
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class SQLiteAddressBook(AddressBook):
+    def __init__(self, filename=None):
+        super().__init__()
+        self.filename = sqlite_filename(filename or addressbook_filename)
+        self.data = SQLiteRecordStore(self.filename, on_load=self._attach)
+
+    def __getstate__(self):
+        raise TypeError("SQLiteAddressBook is stored in SQLite, not pickled")
+
+    def _record_changed(self, record, field, old, new):
+        super()._record_changed(record, field, old, new)
+        if field != "name":
+            self.data[record.name.value] = record
+
+    def _resolve(self, name):
+        if name in self.data:
+            return name
+        if NORMALIZED_NAMES:
+            row = self.data.connection.execute(
+                "SELECT MIN(name) FROM records WHERE name_lower = ?", (normalize_name(name),)).fetchone()
+            return row[0]
+        return None
+
+    def _records_from(self, offset):
+        return self.data.select("1", offset=offset)
+
+    def find_record(self, find_string, limit=None, substring=False):
+        # Як і в AddressBook: без substring - лише імена, що починаються з запиту
+        find_string = find_string.casefold()
+
+        if find_string.isdigit():
+            names = sorted(self.data.names_by_phone(find_string))[:limit]
+            found = [self.data[name] for name in names]
+        elif not substring:
+            # Діапазон по індексу records_name_lower: [prefix, prefix + найбільший символ)
+            prefix = normalize_name(find_string)
+            found = self.data.select(
+                "name_lower >= ? AND name_lower < ? || char(1114111)", (prefix, prefix),
+                order="name_lower", limit=limit)
+        else:
+            # Збіги з середини імені - instr() переглядає всю таблицю
+            found = self.data.select(
+                "instr(name_lower, ?) > 0", (find_string,),
+                order="name_lower = ? DESC, instr(name_lower, ?) = 1 DESC, name_lower",
+                order_params=(find_string, find_string), limit=limit)
+        return self._subset(found)
+
+    def find_by_email(self, email):
+        return self._subset(self.data.select("email = ?", (email,)))
+
+    def find_birthdays(self, number):
+        found = []
+        try:
+            number_days = int(number)
+            today_date = date.today()
+            month_days = set()
+            for i in range(1, min(number_days, 366)):
+                day = today_date + timedelta(days=i)
+                month_days.add(day.month * 100 + day.day)
+                if day.month == 2 and day.day == 28 and not isleap(day.year):
+                    month_days.add(229)
+            month_days.discard(today_date.month * 100 + today_date.day)
+            month_days = sorted(month_days)
+            if month_days:
+                placeholders = ", ".join("?" * len(month_days))
+                found = self.data.select(f"birthday_md IN ({placeholders})", month_days)
+        except ValueError:
+            print(Fore.RED + "You must input number days")
+        finally:
+            return self._subset(found)
+
+    def write_contacts_to_file(self, addressbook_filename=None):
+        if not self._pending:
+            return False
+        self.data.commit()
+        self._pending.clear()
+        return True
+
+    def compact(self, addressbook_filename=None):
+        self.write_contacts_to_file()
+
+    @staticmethod
+    def storage_files(addressbook_filename):
+        return [sqlite_filename(addressbook_filename)]
+
+    @classmethod
+    def read_contacts_from_file(cls, addressbook_filename):
+        background_writer.flush()
+        book = cls(addressbook_filename)
+        if len(book) == 0:
+            if Path(addressbook_filename).exists():
+                # Одноразовий перенос записів зі старого pickle-файлу
+                for record in AddressBook.read_contacts_from_file(addressbook_filename).values():
+                    book.add_record(record)
+                book.write_contacts_to_file()
+            else:
+                print(Fore.RED + "File with recors was deleted or was never created!")
+                print(Fore.GREEN + "I created a file with a records for example!")
+                return cls.fill_AdressBook(book)
+        return book
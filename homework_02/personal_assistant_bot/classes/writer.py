@@ -0,0 +1,114 @@
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+import atexit
+import os
+import pickle
+import threading
+
+try:
+   from settings.settings import BACKGROUND_SAVE
+except ModuleNotFoundError:
+   from personal_assistant_bot.settings.settings import BACKGROUND_SAVE
+
+
+def atomic_write(filename, write, around_replace=None):
+    # Пишемо у тимчасовий файл поруч, fsync, rename поверх старого і fsync каталогу:
+    # після падіння на диску лишається або стара, або нова копія.
+    # around_replace - контекст-менеджер навколо rename (напр. закрити mmap старого файлу)
+    filename = Path(filename)
+    tmp_filename = filename.with_name(filename.name + ".tmp")
+    with open(tmp_filename, "w+b") as fh:
+        write(fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    if around_replace is None:
+        os.replace(tmp_filename, filename)
+    else:
+        with around_replace():
+            os.replace(tmp_filename, filename)
+
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(filename.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_dump(obj, filename):
+    atomic_write(filename, lambda fh: pickle.dump(obj, fh, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class BackgroundWriter:
+    """
+    Single thread that runs save jobs in submission order. A job submitted with
+    `replace=True` (a full snapshot) drops the not yet started jobs for the same
+    file, so a burst of saves results in one write of the latest state.
+    `submit` returns a Future: errors are not printed here, the caller checks them.
+    """
+
+    def __init__(self):
+        self._jobs = deque()
+        self._busy = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, key, job, replace=False):
+        future = Future()
+        if not BACKGROUND_SAVE:
+            self._execute(job, [future])
+            return future
+
+        with self._condition:
+            futures = [future]
+            if replace:
+                # Витіснені збереження завершуються разом зі знімком, що їх замінив
+                jobs = deque()
+                for job_key, queued, queued_futures in self._jobs:
+                    if job_key == key:
+                        futures.extend(queued_futures)
+                    else:
+                        jobs.append((job_key, queued, queued_futures))
+                self._jobs = jobs
+            self._jobs.append((key, job, futures))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+            self._condition.notify_all()
+        return future
+
+    @staticmethod
+    def _execute(job, futures):
+        try:
+            job()
+        except Exception as error:
+            for future in futures:
+                future.set_exception(error)
+        else:
+            for future in futures:
+                future.set_result(None)
+
+    def flush(self):
+        # Чекаємо, поки всі збереження допишуться на диск (перед читанням файлу і при виході)
+        with self._condition:
+            while self._jobs or self._busy:
+                self._condition.wait()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._jobs:
+                    self._condition.wait()
+                key, job, futures = self._jobs.popleft()
+                self._busy = True
+            try:
+                self._execute(job, futures)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+
+background_writer = BackgroundWriter()
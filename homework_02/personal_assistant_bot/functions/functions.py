@@ -3,6 +3,8 @@ try:
 except ModuleNotFoundError:
    from personal_assistant_bot.settings.settings import NOTE_LEN
 
+from calendar import isleap
+from datetime import date
 import os
 import shutil
 import sys
@@ -23,6 +25,12 @@ def make_header(title: str) -> None:
     print(Fore.CYAN + "*" * 30)
     Fore.RESET
 
+def birthday_in_year(month: int, day: int, year: int) -> date:
+    # 29 лютого в невисокосний рік святкуємо 28 лютого
+    if month == 2 and day == 29 and not isleap(year):
+        day = 28
+    return date(year, month, day)
+
 def split_text(text: str) -> list:
 
     result = []
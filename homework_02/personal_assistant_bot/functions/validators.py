@@ -0,0 +1,80 @@
+from datetime import date, datetime
+from functools import lru_cache
+import re
+
+from colorama import Fore
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$')
+PHONE_SEPARATORS = re.compile(r'[\s()./-]')
+
+PHONE_ERROR = 'Incorrect number format. Please enter a 10-digit number.'
+EMAIL_ERROR = 'Incorrect email format. Please enter email like user@example.com.'
+DATE_ERROR = 'Waiting format of date - DD/MM/YYYY. Reinput, please'
+
+
+def normalize_phone(value: str) -> str:
+    """
+    "+38 (067) 123-45-67", "0038067...", "8 067 ...", "38067..." -> "0671234567":
+    прибираємо роздільники; код країни (1-3 цифри) відкидається лише після "+" / "00",
+    без них - лише префікси "8" / "38" перед рівно 10 цифрами. Інша довжина не змінюється
+    і не пройде перевірку.
+    """
+    digits = PHONE_SEPARATORS.sub("", value)
+    if digits.startswith("+") or (digits.startswith("00") and len(digits) > 10):
+        number = digits[1:] if digits.startswith("+") else digits[2:]
+        if 10 < len(number) <= 13 and number.isdigit():
+            digits = number[-10:]
+    elif len(digits) in (11, 12) and digits.isdigit():
+        for prefix in ("8", "38"):
+            if len(digits) == len(prefix) + 10 and digits.startswith(prefix):
+                digits = digits[len(prefix):]
+    return digits
+
+
+def validate_phone(value: str) -> int:
+    if len(value) == 10 and value.isdigit():
+        return int(value)
+    value = normalize_phone(value)
+    if len(value) != 10 or not value.isdigit():
+        raise ValueError(Fore.RED + PHONE_ERROR)
+    return int(value)
+
+
+def validate_email(value: str) -> str:
+    if not EMAIL_PATTERN.match(value):
+        raise ValueError(Fore.RED + EMAIL_ERROR)
+    return value
+
+
+@lru_cache(maxsize=65536)
+def parse_date(value: str) -> int:
+    """
+    DD/MM/YYYY (або ISO YYYY-MM-DD) -> ordinal дати.
+    Рядки рівно такого вигляду розбираються зрізами, решта - через strptime.
+    """
+    try:
+        if len(value) == 10 and value[2] == "/" and value[5] == "/":
+            day, month, year = value[0:2], value[3:5], value[6:10]
+        elif len(value) == 10 and value[4] == "-" and value[7] == "-":
+            year, month, day = value[0:4], value[5:7], value[8:10]
+        else:
+            return datetime.strptime(value, "%d/%m/%Y").toordinal()
+        if not (day.isdigit() and month.isdigit() and year.isdigit()):
+            raise ValueError
+        return date(int(year), int(month), int(day)).toordinal()
+    except (ValueError, TypeError):
+        raise ValueError(Fore.RED + DATE_ERROR) from None
+
+
+def validate_many(validator, values) -> tuple:
+    """
+    Перевірка пачки значень одним викликом: (результати, помилки),
+    помилка - (індекс, значення, повідомлення), невалідні значення пропускаються.
+    """
+    results, errors = [], []
+    for i, value in enumerate(values):
+        try:
+            results.append(validator(value))
+        except ValueError as error:
+            errors.append((i, value, str(error).replace(Fore.RED, "")))
+    return results, errors
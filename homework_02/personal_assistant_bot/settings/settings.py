@@ -3,6 +3,23 @@ from pathlib import Path
 addressbook_filename = Path(Path.home(), "adressbook.pkl")
 notes_filename = Path(Path.home(), "notes.pkl")
 
+# "pickle" - весь AddressBook перезаписується при кожному збереженні
+# "journal" - зміни дописуються в журнал поруч з addressbook_filename
+# "sqlite" - записи зберігаються в SQLite-базі поруч з addressbook_filename
+# "mmap" - бінарний знімок відкривається через mmap, зміни дописуються в журнал
+ADDRESSBOOK_STORAGE = "journal"
+JOURNAL_COMPACT_SIZE = 1000
+
+# пошук запису за ім'ям без урахування регістру і зайвих пробілів
+NORMALIZED_NAMES = True
+# максимальна кількість помилок у слові при нечіткому пошуку
+FUZZY_DISTANCE = 1
+
+# збереження у файли виконує фоновий потік, інтерфейс не чекає на запис
+BACKGROUND_SAVE = True
+
+IMPORT_BATCH_SIZE = 10000
+EXPORT_BUFFER_SIZE = 1024 * 1024
+
 PAG = 4
 NOTE_LEN = 40
-